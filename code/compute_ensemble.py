@@ -1,92 +1,525 @@
 import os
+import io
+import numpy as np
 import pandas as pd 
-import os 
 import json
+import sys
+import re
+from collections import deque
+from fnmatch import fnmatch
 from datetime import date
 from isoweek import Week
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import argparse
 
-parser = argparse.ArgumentParser()
-parser.add_argument('--team_abbr', default="Influcast")
-parser.add_argument('--model_abbr', default="Ensemble")
-
-args = parser.parse_args()
-model_abbr = str(args.model_abbr)
-team_abbr = str(args.team_abbr)
-
-path = "https://raw.githubusercontent.com/Predizioni-Epidemiologiche-Italia/Influcast/main/previsioni/"
-
-models = ["comunipd-mobnetSI2R",
-          "CSL_PoliTo-metaFlu", 
-          "EpiQMUL-ARIMA_QMUL", 
-          "EpiQMUL-SEIR_QMUL",
-          "EpiQMUL-SEIRaugment_QMUL", 
-          "EpiQMUL-EpiQMUL_tabpfnts",
-          "ISI-FluABCaster", 
-          "ISI-FluBcast",
-          "ISI-GLEAM", 
-          "ISI-IPSICast", 
-          "ev_and_modelers-DeepRE",
-          "FBK_HE-REST_HE", 
-          "UNIPD_NEIDE-SEEIIRS_MCMC", 
-          "C2S2_Trento-SIR_INN"]
-
-# compute year_week 
-iso_year, iso_week, _ = date.today().isocalendar()
-week = Week(iso_year, iso_week) - 2
-if week.week < 10: 
-    year_week = str(week.year) + "_0" + str(week.week)
-else: 
-    year_week = str(week.year) + "_" + str(week.week)
-
-model_predictions = pd.DataFrame() 
-for model in models: 
-    try: 
-        df_model = pd.read_csv(os.path.join(path, model, year_week + ".csv"))
-        df_model["model"] = model
-        model_predictions = pd.concat((model_predictions, df_model), ignore_index=True)
-    except: 
-        print("Not found: ", model)
-
-# ensemble_predictions = model_predictions.groupby(["anno", "settimana", "luogo", 
-#                                                   "tipo_valore", "id_valore", 
-#                                                   "orizzonte", "target"], as_index=False).mean()
-
-ensemble_predictions = model_predictions.groupby(["anno", "settimana", "luogo",
-                                                  "tipo_valore", "id_valore",
-                                                  "orizzonte", "target"], as_index=False).mean(numeric_only=True)
-
-ensemble_predictions.to_csv(f"./repo/previsioni/{team_abbr}-{model_abbr}/{year_week}.csv", index=False)
-
-
-unique_horizons = model_predictions.orizzonte.unique()
-unique_regions = model_predictions.luogo.unique()
-unique_targets = model_predictions.target.unique()
-
-ensemble_members = [{"target": []}]
-for target in unique_targets:
-    temp_dict_target = {}
-    temp_dict_target["id"] = target  
-    temp_dict_target["regions"] = []  
-
-    for region in unique_regions:
-        temp_dict_reg = {}
-        temp_dict_reg["id"] = region
-        temp_dict_reg["members"] = []
-        for horizon in unique_horizons:
-            temp_dict_reg["members"].append({"horizon": int(horizon), 
-                                             "models": list(model_predictions.loc[(model_predictions.luogo == region) & \
-                                                                                  (model_predictions.orizzonte == horizon) & \
-                                                                                  (model_predictions.target == target)].model.unique())})
-        temp_dict_target["regions"].append(temp_dict_reg)
-              
-    ensemble_members[0]["target"].append(temp_dict_target)
-
-
-with open(f"./repo/.github/logs/ensemble-members/{year_week}.json", "w") as file:
-    json.dump(ensemble_members, file)
-
-
-env_file = os.getenv('GITHUB_OUTPUT')
-with open(env_file, "a") as outenv:
-   outenv.write (f"ensemble_file={year_week}.csv")
+from forecast_utils import interp_rows, read_forecast_csv
+from data_source import DataSource
+from season_calendar import load_season_calendar, rounds_in_range
+
+# local checkout of the data repository in the ensemble workflow
+LOCAL_CHECKOUT = "./repo"
+
+# models excluded from the ensemble (the hub's own ensembles, fnmatch patterns) and the baseline
+ELIGIBILITY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ensemble_eligibility.json")
+
+ENSEMBLE_KEYS = ["anno", "settimana", "luogo", "tipo_valore", "id_valore", "orizzonte", "target"]
+MEMBER_KEYS = ["target", "luogo", "orizzonte"]
+ENSEMBLE_METHODS = ["mean", "median", "trimmed_mean", "weighted", "lop"]
+JACKKNIFE_METHODS = ["mean", "median"]
+
+
+def load_eligibility(eligibility_file=ELIGIBILITY_FILE):
+    """
+    Read the eligibility config: {"baseline": model, "exclude": [patterns]}.
+    """
+    with open(eligibility_file) as file:
+        eligibility = json.load(file)
+    return {"baseline": eligibility.get("baseline"), "exclude": list(eligibility.get("exclude", []))}
+
+
+def is_eligible(model, eligibility, include_baseline=False):
+    """
+    Whether a model folder contributes to the ensemble.
+    """
+    if model == eligibility["baseline"]:
+        return include_baseline
+    return not any(fnmatch(model, pattern) for pattern in eligibility["exclude"])
+
+
+def build_member_index(source, eligibility, checkout=LOCAL_CHECKOUT):
+    """
+    Index the submitted forecasts, previsioni/<model>/<year_week>.csv, of the 
+    eligible models from one listing of the data repository.
+
+    If the data source cannot be listed (a base URL other than raw GitHub, 
+    or a GitHub API error such as rate limiting), the local checkout is 
+    listed instead.
+
+    Returns:
+    - dict: year_week -> models with a file for that round, sorted.
+    """
+    try:
+        paths = source.list_files("previsioni")
+    except RuntimeError as exc:
+        if not os.path.isdir(os.path.join(checkout, "previsioni")):
+            raise
+        print(f"Listing members from {checkout}: {exc}")
+        paths = DataSource(checkout).list_files("previsioni")
+
+    index = {}
+    for path in paths:
+        match = re.fullmatch(r"previsioni/([^/]+)/(\d{4}_\d{2})\.csv", path)
+        if match is not None and is_eligible(match.group(1), eligibility):
+            index.setdefault(match.group(2), []).append(match.group(1))
+    return {year_week: sorted(models) for year_week, models in index.items()}
+
+
+def iter_member_files(year_week, models, source, window=8):
+    """
+    Download the member forecast files of a round, concurrently, in the order of `models`.
+
+    At most `window` files are being downloaded or waiting to be consumed, 
+    so memory does not grow with the number of members. All downloads share 
+    the pooled HTTP session of the data source; with a local data root files 
+    are read from disk. Failures other than a missing file are retried and 
+    then raised.
+
+    Yields:
+    - tuple: (model, file content (bytes), or None if missing).
+    """
+    def load(model):
+        return source.read_bytes(f"previsioni/{model}/{year_week}.csv")
+
+    with ThreadPoolExecutor(max_workers=max(1, window)) as executor:
+        pending = deque()
+        for model in models:
+            pending.append((model, executor.submit(load, model)))
+            if len(pending) >= window:
+                model_done, future = pending.popleft()
+                yield model_done, future.result()
+        while pending:
+            model_done, future = pending.popleft()
+            yield model_done, future.result()
+
+
+def iter_member_forecasts(year_week, models, source, window=8):
+    """
+    Download and parse the member forecasts of a round one at a time.
+
+    Yields:
+    - tuple: (model, forecasts), in the order of `models`.
+    """
+    for model, content in iter_member_files(year_week, models, source, window=window):
+        if content is None:
+            print("Not found: ", model)
+            continue
+        yield model, read_forecast_csv(io.BytesIO(content))
+
+
+class EnsembleAccumulator:
+    """
+    Running per-key sums and counts of the member forecasts.
+
+    Member files are folded in one at a time as they are downloaded, so for 
+    the mean only the accumulator, the file being added and the download 
+    window of iter_member_files are in memory. Contributing models are tracked per 
+    (target, luogo, orizzonte) for the ensemble-members log. With 
+    keep_values=True the forecast of each member is also kept, to build the 
+    dense [model, key] matrix needed by the other combination methods.
+    """
+
+    def __init__(self, keep_values=False):
+        self.totals = None
+        self.members = {}
+        self.values = {} if keep_values else None
+
+    def add(self, model, df_model):
+        totals = df_model.groupby(ENSEMBLE_KEYS, observed=True)["valore"].agg(["sum", "count"])
+        self.totals = totals if self.totals is None else self.totals.add(totals, fill_value=0)
+        if self.values is not None:
+            self.values[model] = totals["sum"] / totals["count"]
+
+        for key in df_model[MEMBER_KEYS].drop_duplicates().itertuples(index=False, name=None):
+            self.members.setdefault(key, []).append(model)
+
+    def mean(self):
+        """
+        Unweighted mean of the member forecasts of each key.
+        """
+        ensemble = self.totals["sum"] / self.totals["count"]
+        return ensemble.rename("valore").sort_index().reset_index()
+
+    def value_matrix(self):
+        """
+        Dense member forecasts, NaN where a member has no value for a key.
+
+        Returns:
+        - tuple: models, key index and matrix with shape (models, keys).
+        """
+        index = self.totals.index.sort_values()
+        models = list(self.values)
+        matrix = np.vstack([self.values[model].reindex(index).to_numpy(dtype=float) for model in models])
+        return models, index, matrix
+
+
+def combine_members(matrix, method, weights=None, trim_fraction=0.1):
+    """
+    Combine the member forecasts of every key at once.
+
+    Parameters:
+    - matrix (np.ndarray): member forecasts with shape (models, keys), NaN if missing
+    - method (str): one of ENSEMBLE_METHODS
+    - weights (np.ndarray): weight of each model, for the weighted method
+    - trim_fraction (float): fraction of members dropped at each end, for the trimmed mean. (Defaults to 0.1).
+
+    Returns:
+    - np.ndarray: ensemble forecast of each key, NaN for weighted keys whose members all have weight 0.
+    """
+    available = ~np.isnan(matrix)
+
+    if method == "mean":
+        return np.nanmean(matrix, axis=0)
+
+    if method == "median":
+        return np.nanmedian(matrix, axis=0)
+
+    if method == "trimmed_mean":
+        # NaNs sort last, so the members of each key are its first n rows
+        sorted_matrix = np.sort(matrix, axis=0)
+        n = available.sum(axis=0)
+        k = np.floor(trim_fraction * n)
+        ranks = np.arange(matrix.shape[0])[:, None]
+        kept = (ranks >= k) & (ranks < n - k)
+        return np.where(kept, sorted_matrix, 0).sum(axis=0) / kept.sum(axis=0)
+
+    if method == "weighted":
+        weights = np.where(available, np.asarray(weights, dtype=float)[:, None], 0)
+        total = weights.sum(axis=0)
+        weighted_sum = (weights * np.where(available, matrix, 0)).sum(axis=0)
+        return np.divide(weighted_sum, total, out=np.full_like(total, np.nan), where=total > 0)
+
+    raise ValueError(f"Unknown ensemble method '{method}'. Available methods: {ENSEMBLE_METHODS}")
+
+
+def linear_opinion_pool(index, matrix):
+    """
+    Probability-averaging (linear opinion pool) ensemble of quantile forecasts.
+
+    The quantiles of each member define a piecewise-linear CDF (0 below the 
+    lowest quantile, 1 above the highest). The CDFs of the available members 
+    are averaged and inverted back at the published quantile levels. Since 
+    the average of piecewise-linear CDFs is piecewise linear on the union of 
+    their knots, the CDFs are evaluated exactly on those knots (and just around 
+    them, to keep the jumps at the extremes), for all groups and 
+    models in one batched interpolation.
+
+    Parameters:
+    - index (pd.MultiIndex): ENSEMBLE_KEYS of the matrix columns
+    - matrix (np.ndarray): member forecasts with shape (models, keys), NaN if missing
+
+    Returns:
+    - pd.DataFrame: ensemble quantile forecasts.
+    """
+    # [group, model, quantile] cube of the quantile forecasts
+    group_keys = [key for key in ENSEMBLE_KEYS if key != "id_valore"]
+    values = pd.DataFrame(matrix.T, index=index).loc[index.get_level_values("tipo_valore") == "quantile"]
+    values = values.unstack("id_valore")
+    levels = values.columns.levels[1].to_numpy(dtype=float)
+    cube = values.to_numpy().reshape(len(values), matrix.shape[0], len(levels))
+
+    # members need the full quantile set of the group
+    complete = ~np.isnan(cube).any(axis=2)
+    cube = np.sort(np.where(complete[:, :, None], cube, 0.0), axis=2)
+
+    # CDF of each member at the union of the knots of the group
+    ngroups, nmodels, nlevels = cube.shape
+    knots = np.sort(np.where(complete[:, :, None], cube, np.nan).reshape(ngroups, -1), axis=1)
+    knots = np.where(np.isnan(knots), np.nanmax(knots, axis=1, keepdims=True), knots)
+
+    # member CDFs jump at their extreme quantiles: add both limits of each knot
+    knots = np.sort(np.concatenate((np.nextafter(knots, -np.inf), knots, np.nextafter(knots, np.inf)), axis=1), axis=1)
+    cdf = interp_rows(np.repeat(knots, nmodels, axis=0), 
+                      cube.reshape(ngroups * nmodels, nlevels), 
+                      np.broadcast_to(levels, (ngroups * nmodels, nlevels)), 
+                      left=0.0, right=1.0).reshape(ngroups, nmodels, -1)
+
+    # average over the available members and invert
+    pooled = (cdf * complete[:, :, None]).sum(axis=1) / complete.sum(axis=1)[:, None]
+    pooled = np.maximum.accumulate(pooled, axis=1)
+    quantiles = interp_rows(levels, pooled, knots)
+
+    ensemble = pd.DataFrame(quantiles, index=values.index, columns=pd.Index(levels, name="id_valore"))
+    ensemble = ensemble.stack().rename("valore").reset_index()
+    return ensemble[ENSEMBLE_KEYS + ["valore"]].sort_values(ENSEMBLE_KEYS, ignore_index=True)
+
+
+def load_weights(weights_file, models):
+    """
+    Read member weights from a CSV file with columns model, weight.
+
+    Members not listed in the file get weight 0.
+    """
+    weights = pd.read_csv(weights_file).set_index("model")["weight"]
+    for model in models:
+        if model not in weights.index:
+            print("No weight for: ", model)
+    return weights.reindex(models).fillna(0).to_numpy(dtype=float)
+
+
+def compute_ensembles(accumulator, methods, weights_file=None, trim_fraction=0.1):
+    """
+    Compute the ensemble forecasts of several combination methods from one data load.
+
+    Returns:
+    - dict: method -> ensemble forecasts.
+    """
+    ensembles = {}
+    if "mean" in methods:
+        ensembles["mean"] = accumulator.mean()
+
+    other_methods = [method for method in methods if method != "mean"]
+    if len(other_methods) > 0:
+        models, index, matrix = accumulator.value_matrix()
+        weights = load_weights(weights_file, models) if "weighted" in other_methods else None
+        for method in other_methods:
+            if method == "lop":
+                ensembles[method] = linear_opinion_pool(index, matrix)
+                continue
+            ensemble = pd.Series(combine_members(matrix, method, weights=weights, trim_fraction=trim_fraction), 
+                                 index=index, name="valore")
+            if ensemble.isna().any():
+                # keys covered only by members without weight
+                print(f"Dropped {ensemble.isna().sum()} rows without weighted members")
+                ensemble = ensemble.dropna()
+            ensembles[method] = ensemble.reset_index()
+
+    return ensembles
+
+
+def leave_one_out(matrix, method):
+    """
+    Leave-one-model-out ensembles of every member, in a single pass.
+
+    Means come from the per-key sum and count (sum minus member, count minus 
+    one). Medians come from the members sorted once per key: without the 
+    member at rank r, the i-th remaining value is sorted[i] if i < r, 
+    sorted[i + 1] otherwise.
+
+    Parameters:
+    - matrix (np.ndarray): member forecasts with shape (models, keys), NaN if missing
+    - method (str): one of JACKKNIFE_METHODS
+
+    Returns:
+    - np.ndarray: ensemble without each model, shape (models, keys); NaN if no other member.
+    """
+    available = ~np.isnan(matrix)
+    n = available.sum(axis=0)
+    n_rest = n - available
+
+    if method == "mean":
+        totals = np.nansum(matrix, axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (totals - np.where(available, matrix, 0)) / np.where(n_rest > 0, n_rest, np.nan)
+
+    if method == "median":
+        # NaNs sort last, so the members of each key are its first n rows
+        order = np.argsort(matrix, axis=0, kind="stable")
+        sorted_matrix = np.take_along_axis(matrix, order, axis=0)
+        rank = np.empty_like(order)
+        np.put_along_axis(rank, order, np.arange(matrix.shape[0])[:, None], axis=0)
+        rank = np.where(available, rank, n)
+
+        def remaining(i):
+            i = np.clip(i, 0, matrix.shape[0] - 2)
+            shifted = np.where(i < rank, i, i + 1)
+            return np.take_along_axis(sorted_matrix, np.broadcast_to(shifted, matrix.shape), axis=0)
+
+        lower, upper = (n_rest - 1) // 2, n_rest // 2
+        medians = (remaining(lower) + remaining(upper)) / 2
+        return np.where(n_rest > 0, medians, np.nan)
+
+    raise ValueError(f"Unknown jackknife method '{method}'. Available methods: {JACKKNIFE_METHODS}")
+
+
+def compute_jackknife_ensembles(accumulator, methods):
+    """
+    Compute the leave-one-model-out ensembles of every member from one data load.
+
+    Returns:
+    - dict: (method, model) -> ensemble forecasts without the model.
+    """
+    models, index, matrix = accumulator.value_matrix()
+
+    ensembles = {}
+    for method in methods:
+        loo = leave_one_out(matrix, method)
+        for i, model in enumerate(models):
+            ensemble = pd.Series(loo[i], index=index, name="valore").dropna()
+            ensembles[(method, model)] = ensemble.reset_index()
+    return ensembles
+
+
+def build_ensemble_members(members):
+    """
+    Build the ensemble-members log: models contributing to each target, region and horizon.
+
+    Parameters:
+    - members (dict): (target, luogo, orizzonte) -> models, in order of appearance.
+    """
+    unique_targets = list(dict.fromkeys(key[0] for key in members))
+    unique_regions = list(dict.fromkeys(key[1] for key in members))
+    unique_horizons = list(dict.fromkeys(key[2] for key in members))
+
+    ensemble_members = [{"target": []}]
+    for target in unique_targets:
+        temp_dict_target = {}
+        temp_dict_target["id"] = target  
+        temp_dict_target["regions"] = []  
+
+        for region in unique_regions:
+            temp_dict_reg = {}
+            temp_dict_reg["id"] = region
+            temp_dict_reg["members"] = []
+            for horizon in unique_horizons:
+                temp_dict_reg["members"].append({"horizon": int(horizon), 
+                                                 "models": list(members.get((target, region, horizon), []))})
+            temp_dict_target["regions"].append(temp_dict_reg)
+                  
+        ensemble_members[0]["target"].append(temp_dict_target)
+
+    return ensemble_members
+
+
+def build_round(year_week, 
+                models, 
+                methods=["mean"], 
+                weights_file=None, 
+                trim_fraction=0.1, 
+                jackknife=False, 
+                team_abbr="Influcast", 
+                model_abbr="Ensemble", 
+                data_root=None, 
+                timeout=30, 
+                retries=3, 
+                window=8):
+    """
+    Compute and write the ensembles and the ensemble-members log of a round.
+
+    Parameters:
+    - year_week (str): forecasting round, e.g. "2026_05"
+    - models (list): members with a file for the round, see build_member_index
+    - window (int): member files downloaded ahead of the one being folded. (Defaults to 8).
+
+    Returns:
+    - bool: True if the round had member forecasts and the ensembles were written.
+    """
+    source = DataSource(data_root, timeout=timeout, retries=retries, pool_size=window)
+
+    # fold member forecasts into the running ensemble as they are downloaded
+    accumulator = EnsembleAccumulator(keep_values=methods != ["mean"] or jackknife)
+    for model, df_model in iter_member_forecasts(year_week, models, source, window=window):
+        accumulator.add(model, df_model)
+
+    if accumulator.totals is None:
+        print("No member forecasts for round: ", year_week)
+        return False
+
+    ensembles = compute_ensembles(accumulator, methods, weights_file=weights_file, trim_fraction=trim_fraction)
+    for method, ensemble_predictions in ensembles.items():
+        ensemble_abbr = model_abbr if len(methods) == 1 else f"{model_abbr}_{method}"
+        os.makedirs(f"./repo/previsioni/{team_abbr}-{ensemble_abbr}", exist_ok=True)
+        ensemble_predictions.to_csv(f"./repo/previsioni/{team_abbr}-{ensemble_abbr}/{year_week}.csv", index=False)
+
+    if jackknife:
+        # leave-one-model-out ensembles, one folder per left out member
+        jackknife_ensembles = compute_jackknife_ensembles(accumulator, methods)
+        for (method, model), ensemble_predictions in jackknife_ensembles.items():
+            ensemble_abbr = model_abbr if len(methods) == 1 else f"{model_abbr}_{method}"
+            ensemble_abbr = f"{ensemble_abbr}_without_{model.replace('-', '_')}"
+            os.makedirs(f"./repo/previsioni/{team_abbr}-{ensemble_abbr}", exist_ok=True)
+            ensemble_predictions.to_csv(f"./repo/previsioni/{team_abbr}-{ensemble_abbr}/{year_week}.csv", index=False)
+
+
+    ensemble_members = build_ensemble_members(accumulator.members)
+
+    with open(f"./repo/.github/logs/ensemble-members/{year_week}.json", "w") as file:
+        json.dump(ensemble_members, file)
+
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--team_abbr', default="Influcast")
+    parser.add_argument('--model_abbr', default="Ensemble")
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--method', nargs='+', choices=ENSEMBLE_METHODS, default=["mean"], 
+                        help='Combination methods; with several methods each is written as <model_abbr>_<method>')
+    parser.add_argument('--weights_file', default=None, help='CSV with columns model, weight (weighted method)')
+    parser.add_argument('--trim_fraction', type=float, default=0.1)
+    parser.add_argument('--jackknife', action='store_true', 
+                        help='Also write the ensemble without each member, as <ensemble>_without_<model>')
+    parser.add_argument('--rounds', default=None, help='Rebuild a range of rounds, e.g. 2025_45:2026_15')
+    parser.add_argument('--season', default=None, help='Rebuild every round of a season, e.g. 2025-2026')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--data_root', '--data-root', default=None, help='Local checkout or base URL of the data repository')
+    parser.add_argument('--eligibility_file', default=ELIGIBILITY_FILE, help='JSON with the baseline and the models excluded from the ensemble')
+
+    args = parser.parse_args()
+    model_abbr = str(args.model_abbr)
+    team_abbr = str(args.team_abbr)
+    eligibility = load_eligibility(args.eligibility_file)
+    methods = list(dict.fromkeys(args.method))
+    if "weighted" in methods and args.weights_file is None:
+        parser.error("--weights_file is required by the weighted method")
+    if args.jackknife and not set(methods) <= set(JACKKNIFE_METHODS):
+        parser.error(f"--jackknife supports the methods {JACKKNIFE_METHODS}")
+
+    options = dict(methods=methods, 
+                   weights_file=args.weights_file, 
+                   trim_fraction=args.trim_fraction, 
+                   jackknife=args.jackknife, 
+                   team_abbr=team_abbr, 
+                   model_abbr=model_abbr, 
+                   data_root=args.data_root, 
+                   timeout=args.timeout, 
+                   retries=args.retries)
+
+    # members of every round, from one listing of the data repository
+    index = build_member_index(DataSource(args.data_root, timeout=args.timeout, retries=args.retries), eligibility)
+
+    # compute year_week 
+    iso_year, iso_week, _ = date.today().isocalendar()
+    week = Week(iso_year, iso_week) - 2
+    if week.week < 10: 
+        year_week = str(week.year) + "_0" + str(week.week)
+    else: 
+        year_week = str(week.year) + "_" + str(week.week)
+
+    if args.rounds is not None or args.season is not None:
+        # rebuild past rounds, one round per worker; each worker streams its own member files
+        weeks = rounds_in_range(args.rounds) if args.rounds is not None else load_season_calendar(args.season, args.data_root).year_weeks()
+        year_weeks = [f"{year}_{week_round:02d}" for year, week_round in weeks if (year, week_round) <= (week.year, week.week)]
+
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            futures = [executor.submit(build_round, round_week, index.get(round_week, []), **options) 
+                       for round_week in year_weeks]
+            written = [future.result() for future in futures]
+        empty = [round_week for round_week, round_written in zip(year_weeks, written) if not round_written]
+        print(f"Rebuilt {len(year_weeks) - len(empty)} rounds")
+        if len(empty) > 0:
+            print(f"No member forecasts for {len(empty)} rounds: {', '.join(empty)}")
+        return
+
+    if not build_round(year_week, index.get(year_week, []), **options):
+        print(f"Error: no ensemble written for round {year_week}", file=sys.stderr)
+        sys.exit(1)
+
+    env_file = os.getenv('GITHUB_OUTPUT')
+    with open(env_file, "a") as outenv:
+       outenv.write (f"ensemble_file={year_week}.csv")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,44 +2,65 @@
 Compute the InfluMeter index and MEM activity band probabilities for each
 region and forecast horizon, for a given Influcast forecasting week.
 
-Standalone script: reads the ensemble forecast directly from the Influcast
-GitHub repository and writes a CSV matching the Influcast dashboard data
+Standalone script: reads the ensemble forecast from the Influcast data
+repository (GitHub, or a local checkout with --data_root) and writes a CSV matching the Influcast dashboard data
 schema (model_id, horizon, start_date, end_date, location_id, target,
 p_baseline, p_low, p_medium, p_high, p_very_high, influmeter_index).
+In batch mode it computes a range of rounds (or a season) for several
+models and targets in one pass, writing one <round>_influmeter.csv each.
+MEM thresholds are read from the versioned registry mem_thresholds.json
+(per season, target and location).
 
 Usage:
-    python compute_influmeter_index.py <forecasting_week> <output_path>
+    python compute_influmeter_index.py <forecasting_week> <output_path> [--data_root PATH]
+    python compute_influmeter_index.py (--rounds FROM:TO | --season SEASON) [--models ...] [--targets ...] [--output_dir DIR]
 
 Example:
     python compute_influmeter_index.py 2026_09 ./output/2026_09_influmeter.csv
+    python compute_influmeter_index.py --season 2025-2026 --models Influcast-Ensemble ISI-GLEAM --output_dir ./output
 """
 
 import argparse
+import hashlib
+import io
+import json
+import os
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
+from functools import lru_cache
 
 import numpy as np
 import pandas as pd
 
-ENSEMBLE_URL = "https://raw.githubusercontent.com/Predizioni-Epidemiologiche-Italia/Influcast/refs/heads/main/previsioni/Influcast-Ensemble/{}.csv"
+import forecast_utils
+from data_source import DataSource
+from forecast_utils import FORECAST_COLUMNS, interp_rows, read_forecast_csv
+from season_calendar import load_season_calendar, rounds_in_range
+
+FORECAST_PATH = "previsioni/{model}/{round}.csv"
+ENSEMBLE_MODEL = "Influcast-Ensemble"
 
 MODEL_ID = "ensemble"
+# model_id of the output for each model folder; other models keep the folder name
+MODEL_IDS = {ENSEMBLE_MODEL: MODEL_ID}
 TARGET = "ARI"
 HORIZONS = [1, 2, 3, 4]
 
+GROUP_KEYS = ["round", "model_id", "target", "luogo", "orizzonte", "anno", "settimana"]
+OUTPUT_COLUMNS = [
+    "model_id", "horizon", "start_date", "end_date", "location_id",
+    "target", "p_baseline", "p_low", "p_medium", "p_high",
+    "p_very_high", "influmeter_index",
+]
+
 LEVELS = ["baseline", "low", "medium", "high", "very_high"]
 WKS = [0., 20., 40., 60., 80., 100.]
 
-# MEM thresholds, in casi per mille assistiti (same unit as forecasted incidence).
-MEM_THRESHOLDS = {
-    "2025-2026": {
-        "baseline": [0., 7.22],
-        "low": [7.22, 13.35],
-        "medium": [13.35, 17.43],
-        "high": [17.43, 19.61],
-        "very_high": [19.61, float("inf")],
-    },
-}
+# Versioned MEM threshold registry: season -> target -> location ("*" for 
+# every location without its own) -> band -> [lower, upper], null if unbounded.
+THRESHOLDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mem_thresholds.json")
 
 # Full quantile spread published by the ensemble; treated as the entire
 # probability mass (0% to 100%) when computing band probabilities.
@@ -47,72 +68,224 @@ QUANTILE_MIN = 0.01
 QUANTILE_MAX = 0.99
 
 
-def resolve_season(forecasting_week):
+def compile_thresholds(thresholds):
     """
-    Resolve the surveillance season from a forecasting week id "YYYY_WW".
+    Precompile the MEM thresholds of a season into sorted band edges.
 
-    Surveillance seasons start around week 40, so a week number greater
-    than 35 is assigned to the season starting that year; otherwise it
-    belongs to the season that started the previous year.
+    Returns:
+    - np.ndarray: lower edge of each band of LEVELS, followed by the upper edge of the last band.
     """
-    year_str, week_str = forecasting_week.split("_")
-    year, week = int(year_str), int(week_str)
-    if week > 35:
-        return f"{year}-{year + 1}"
-    return f"{year - 1}-{year}"
+    bands = np.array([[np.inf if edge is None else edge for edge in thresholds[level]] for level in LEVELS], dtype=float)
+    if not np.array_equal(bands[1:, 0], bands[:-1, 1]) or np.any(np.diff(bands[:, 0]) <= 0):
+        raise ValueError(f"MEM bands must be contiguous and increasing: {thresholds}")
+    return np.append(bands[:, 0], bands[-1, 1])
 
 
-def get_influmeter_index(value, thresholds):
+class ThresholdRegistry:
+    """
+    MEM thresholds of several seasons, targets and locations.
+
+    All thresholds are compiled once, at load time, into one table of band 
+    edges (one row per season, target and location entry), with a dict 
+    index from (season, target, location) to its row. The thresholds of 
+    location "*" apply to every location without its own.
+    """
+
+    def __init__(self, registry):
+        self.version = str(registry["version"])
+        self.season_start_week = int(registry.get("season_start_week", 36))
+        self.registry = registry
+
+        keys, edges = [], []
+        for season, targets in registry["seasons"].items():
+            for target, locations in targets.items():
+                for location, thresholds in locations.items():
+                    keys.append((season, target, location))
+                    edges.append(compile_thresholds(thresholds))
+        self.edges = np.vstack(edges) if len(edges) > 0 else np.empty((0, len(LEVELS) + 1))
+        self.index = {key: row for row, key in enumerate(keys)}
+        self.seasons = list(registry["seasons"])
+
+    def resolve_season(self, forecasting_week):
+        """
+        Resolve the surveillance season from a forecasting week id "YYYY_WW".
+
+        Surveillance seasons start around week 40, so a week number of at 
+        least season_start_week is assigned to the season starting that 
+        year; otherwise it belongs to the season that started the previous 
+        year.
+        """
+        year_str, week_str = forecasting_week.split("_")
+        year, week = int(year_str), int(week_str)
+        if week >= self.season_start_week:
+            return f"{year}-{year + 1}"
+        return f"{year - 1}-{year}"
+
+    def lookup(self, season, target, location):
+        """
+        Row of the edge table of a season, target and location, or -1 if it has no thresholds.
+        """
+        row = self.index.get((season, target, location))
+        if row is None:
+            row = self.index.get((season, target, "*"), -1)
+        return row
+
+    def rows(self, seasons, targets, locations):
+        """
+        Rows of the edge table of many groups, one lookup per distinct key.
+        """
+        keys = list(zip(seasons, targets, locations))
+        rows = {key: self.lookup(*key) for key in set(keys)}
+        return np.array([rows[key] for key in keys], dtype=int)
+
+    def thresholds(self, season, target=TARGET, location="*"):
+        """
+        Band edges of a season, target and location.
+        """
+        row = self.lookup(season, target, location)
+        if row < 0:
+            raise ValueError(f"No MEM thresholds for season '{season}', target '{target}', location '{location}'")
+        return self.edges[row]
+
+    def season_version(self, season):
+        """
+        Registry version and hash of the thresholds of a season.
+        """
+        content = json.dumps(self.registry["seasons"].get(season), sort_keys=True)
+        return f"{self.version}:{hashlib.sha256(content.encode()).hexdigest()}"
+
+
+@lru_cache(maxsize=None)
+def load_threshold_registry(thresholds_file=THRESHOLDS_FILE):
+    """
+    Read and compile the MEM threshold registry, once per file.
+    """
+    with open(thresholds_file) as file:
+        return ThresholdRegistry(json.load(file))
+
+
+def resolve_season(forecasting_week):
+    """
+    Resolve the surveillance season from a forecasting week id "YYYY_WW" 
+    (see ThresholdRegistry.resolve_season).
+    """
+    return load_threshold_registry().resolve_season(forecasting_week)
+
+
+def map_influmeter_index(values, edges):
     """
-    Map an incidence value to the InfluMeter index (0-100) and MEM level,
+    Map incidence values to the InfluMeter index (0-100) and MEM level code,
     via piecewise-linear interpolation within the matching MEM band.
+
+    Values of any shape are mapped at once, e.g. the medians of all groups, 
+    or samples of a predictive distribution to get the distribution of the 
+    index. Values in the last band are mapped to 100 if it is unbounded; 
+    values outside the bands (shouldn't happen, the lowest edge is 0) to 0.
+
+    Parameters:
+    - values (np.ndarray): incidence values
+    - edges (np.ndarray): band edges, see compile_thresholds, shared by all 
+      values; or one row of edges per value, shape values.shape + (nedges,)
+
+    Returns:
+    - tuple: index (np.ndarray) and level code (np.ndarray, position in LEVELS), shaped like values.
     """
-    for idx, level in enumerate(LEVELS):
-        lo, hi = thresholds[level]
-        if value >= lo and value < hi:
-            if np.isinf(hi):
-                return WKS[idx + 1], level
-            frac = (value - lo) / (hi - lo)
-            index = WKS[idx] + (WKS[idx + 1] - WKS[idx]) * frac
-            return index, level
-    # value below the lowest threshold's lower bound (shouldn't happen, lo=0)
-    return WKS[0], LEVELS[0]
+    values = np.asarray(values, dtype=float)
+    edges = np.asarray(edges, dtype=float)
+    wks = np.asarray(WKS, dtype=float)
+    nbands = edges.shape[-1] - 1
+
+    if edges.ndim == 1:
+        code = np.searchsorted(edges, values, side="right") - 1
+    else:
+        # per-value edges: same count as searchsorted(side="right")
+        code = (edges <= values[..., None]).sum(axis=-1) - 1
+    inside = (code >= 0) & (code < nbands)
+    code = np.where(inside, code, 0)
+
+    # interpolation within the band of each value; the unbounded band maps to its upper index
+    if edges.ndim == 1:
+        lo, hi = edges[code], edges[code + 1]
+    else:
+        lo = np.take_along_axis(edges, code[..., None], axis=-1)[..., 0]
+        hi = np.take_along_axis(edges, code[..., None] + 1, axis=-1)[..., 0]
+    with np.errstate(invalid="ignore"):
+        index = wks[code] + (wks[code + 1] - wks[code]) * ((values - lo) / (hi - lo))
+    index = np.where(np.isinf(hi), wks[code + 1], index)
+    return np.where(inside, index, wks[0]), code
 
 
-def compute_band_probabilities(quantiles, values, thresholds):
+def get_influmeter_index(value, thresholds):
     """
-    Compute the probability (%) of the true value falling in each MEM band,
-    from a set of predictive quantiles.
+    Map an incidence value to the InfluMeter index (0-100) and MEM level
+    (see map_influmeter_index).
+    """
+    index, code = map_influmeter_index(value, compile_thresholds(thresholds))
+    return float(index), LEVELS[int(code)]
+
 
-    The quantile spread [QUANTILE_MIN, QUANTILE_MAX] is rescaled to
-    represent the full [0, 1] probability mass, with no further tail
-    adjustment.
+def band_probability_matrix(quantiles, values, edges):
+    """
+    Compute the probability (%) of the true value falling in each MEM band 
+    for many groups at once, from their predictive quantiles.
+
+    The CDF of every group is evaluated at all band edges in one batched 
+    interpolation. The quantile spread [QUANTILE_MIN, QUANTILE_MAX] is 
+    rescaled to represent the full [0, 1] probability mass, with no further 
+    tail adjustment.
+
+    Parameters:
+    - quantiles (np.ndarray): quantile levels, shared by all groups, sorted
+    - values (np.ndarray): quantile values with shape (groups, len(quantiles))
+    - edges (np.ndarray): band edges, see compile_thresholds, shared by all 
+      groups; or one row of edges per group, shape (groups, nedges)
+
+    Returns:
+    - np.ndarray: band probabilities with shape (groups, len(LEVELS)), in the order of LEVELS.
     """
     quantiles = np.asarray(quantiles, dtype=float)
     values = np.asarray(values, dtype=float)
 
     mask = (quantiles >= QUANTILE_MIN) & (quantiles <= QUANTILE_MAX)
-    quantiles, values = quantiles[mask], values[mask]
+    quantiles, values = quantiles[mask], values[:, mask]
+    cdf = (quantiles - QUANTILE_MIN) / (QUANTILE_MAX - QUANTILE_MIN)
+
+    # CDF of every group at all band edges; band i lies between edges i and i + 1
+    F = interp_rows(edges, values, np.broadcast_to(cdf, values.shape), left=0.0, right=1.0)
+
+    probs = np.maximum(0.0, (F[:, 1:] - F[:, :-1]) * 100)
+    total = probs.sum(axis=1, keepdims=True)
+    return np.divide(probs * 100, total, out=probs, where=total > 0)
 
+
+def compute_band_probabilities(quantiles, values, thresholds):
+    """
+    Compute the probability (%) of the true value falling in each MEM band,
+    from a set of predictive quantiles (see band_probability_matrix).
+    """
+    quantiles = np.asarray(quantiles, dtype=float)
+    values = np.asarray(values, dtype=float)
     order = np.argsort(quantiles)
-    quantiles, values = quantiles[order], values[order]
+    probs = band_probability_matrix(quantiles[order], values[None, order], compile_thresholds(thresholds))[0]
+    return {level: float(p) for level, p in zip(LEVELS, probs)}
 
-    cdf = (quantiles - QUANTILE_MIN) / (QUANTILE_MAX - QUANTILE_MIN)
 
-    def F(x):
-        if np.isinf(x):
-            return 1.0
-        return float(np.interp(x, values, cdf, left=0.0, right=1.0))
+def pivot_quantiles(df, keys=GROUP_KEYS):
+    """
+    Pivot long-format quantile forecasts into a [group, quantile] matrix.
 
-    probs = {}
-    for level in LEVELS:
-        lo, hi = thresholds[level]
-        probs[level] = max(0.0, (F(hi) - F(lo)) * 100)
+    Parameters:
+    - df (pd.DataFrame): quantile forecasts
+    - keys (list): columns identifying a group. (Defaults to GROUP_KEYS).
 
-    total = sum(probs.values())
-    if total > 0:
-        probs = {level: p * 100 / total for level, p in probs.items()}
-    return probs
+    Returns:
+    - tuple: groups (pd.DataFrame), quantile levels (np.ndarray, sorted) and 
+      values (np.ndarray), NaN where a group has no value for a level.
+    """
+    wide = df.pivot_table(index=keys, columns="id_valore", values="valore", aggfunc="first", observed=True)
+    wide = wide.sort_index(axis=1)
+    groups = wide.index.to_frame(index=False)
+    return groups, wide.columns.to_numpy(dtype=float), wide.to_numpy(dtype=float)
 
 
 def target_week_dates(year, week, horizon):
@@ -126,90 +299,314 @@ def target_week_dates(year, week, horizon):
     return target_monday.isoformat(), target_sunday.isoformat()
 
 
-def fetch_ensemble(forecasting_week):
-    url = ENSEMBLE_URL.format(forecasting_week)
+def check_season(forecasting_week):
+    registry = load_threshold_registry()
+    season = registry.resolve_season(forecasting_week)
+    if season not in registry.seasons:
+        raise ValueError(
+            f"No MEM thresholds defined for season '{season}' "
+            f"(resolved from forecasting week '{forecasting_week}'). "
+            f"Available seasons: {registry.seasons}"
+        )
+    return season
+
+
+def fetch_forecast_file(source, model, forecasting_week):
+    path = FORECAST_PATH.format(model=model, round=forecasting_week)
     try:
-        return pd.read_csv(url)
+        content = source.read_bytes(path)
+        if content is None:
+            raise FileNotFoundError(f"File not found: {source.location(path)}")
     except Exception as exc:
         raise RuntimeError(
-            f"Could not load ensemble forecast for round '{forecasting_week}' from {url}: {exc}"
+            f"Could not load {model} forecast for round '{forecasting_week}' from {source.location(path)}: {exc}"
         ) from exc
+    return content
 
 
-def compute_influmeter(forecasting_week):
-    season = resolve_season(forecasting_week)
-    if season not in MEM_THRESHOLDS:
-        raise ValueError(
-            f"No MEM thresholds defined for season '{season}' "
-            f"(resolved from forecasting week '{forecasting_week}'). "
-            f"Available seasons: {list(MEM_THRESHOLDS.keys())}"
-        )
-    thresholds = MEM_THRESHOLDS[season]
+def fetch_ensemble(forecasting_week, data_root=None):
+    return read_forecast_csv(io.BytesIO(fetch_forecast_file(DataSource(data_root), ENSEMBLE_MODEL, forecasting_week)))
+
+
+def load_forecast_files(rounds, models, data_root=None, workers=16):
+    """
+    Load the forecast files of several rounds and models, concurrently and 
+    through one data source (and its HTTP cache). Missing files are skipped.
+
+    Returns:
+    - dict: (round, model) -> file content (bytes).
+    """
+    source = DataSource(data_root, pool_size=workers)
+    files = [(forecasting_week, model) for forecasting_week in rounds for model in models]
+
+    def load(file):
+        forecasting_week, model = file
+        content = source.read_bytes(FORECAST_PATH.format(model=model, round=forecasting_week))
+        if content is None:
+            print(f"Not found: {model} {forecasting_week}")
+        return content
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        contents = list(executor.map(load, files))
+    return {file: content for file, content in zip(files, contents) if content is not None}
+
+
+def forecasts_frame(contents):
+    """
+    Parse forecast files into one frame, with the round and model_id of each row.
+    """
+    frames = [read_forecast_csv(io.BytesIO(content)).assign(round=forecasting_week, model_id=MODEL_IDS.get(model, model))
+              for (forecasting_week, model), content in contents.items()]
+    if len(frames) == 0:
+        return pd.DataFrame(columns=["round", "model_id"] + FORECAST_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+@lru_cache(maxsize=None)
+def code_version():
+    """
+    Hash of the code producing the influmeter tables.
+    """
+    digest = hashlib.sha256()
+    for module in (__file__, forecast_utils.__file__):
+        with open(module, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
 
-    df = fetch_ensemble(forecasting_week)
+
+def thresholds_version(season):
+    """
+    Version of the MEM thresholds of a season.
+    """
+    return load_threshold_registry().season_version(season)
+
+
+def file_hash(path):
+    try:
+        with open(path, "rb") as file:
+            return hashlib.sha256(file.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+class SkipCache:
+    """
+    Content-addressed record of the written influmeter tables.
+
+    Each output file is recorded with the key of its inputs (hash of the 
+    forecast files, thresholds version, code version, models and targets) 
+    and the hash of its content. An output whose key is unchanged and whose 
+    file is intact is up to date and need not be recomputed or rewritten.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path) as file:
+                self.entries = json.load(file)
+        except FileNotFoundError:
+            self.entries = {}
+
+    @staticmethod
+    def key(contents, season, models, targets):
+        digest = hashlib.sha256()
+        digest.update(json.dumps([code_version(), thresholds_version(season), list(models), list(targets)]).encode())
+        for content in contents:
+            digest.update(hashlib.sha256(content).digest() if content is not None else b"missing")
+        return digest.hexdigest()
+
+    def is_current(self, output_path, key):
+        entry = self.entries.get(os.path.normpath(output_path))
+        return entry is not None and entry["key"] == key and entry["output"] == file_hash(output_path)
+
+    def record(self, output_path, key):
+        self.entries[os.path.normpath(output_path)] = {"key": key, "output": file_hash(output_path)}
+
+    def save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as file:
+            json.dump(self.entries, file, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+def influmeter_table(df, targets=(TARGET,)):
+    """
+    Compute the InfluMeter index and MEM band probabilities of every model, 
+    round, target, region and horizon of long-format forecasts in one 
+    vectorized pass.
+
+    Each group is evaluated with the thresholds of its season, target and 
+    location from the threshold registry, and groups sharing a set of 
+    quantile levels in one batched call. Groups without a median or without 
+    thresholds are dropped.
+
+    Parameters:
+    - df (pd.DataFrame): forecasts with round and model_id columns, see forecasts_frame
+    - targets (list): targets to compute. (Defaults to ARI).
+
+    Returns:
+    - pd.DataFrame: OUTPUT_COLUMNS and the round of each row.
+    """
     df = df[
-        (df["target"] == TARGET)
+        (df["target"].isin(targets))
         & (df["tipo_valore"] == "quantile")
         & (df["orizzonte"].isin(HORIZONS))
     ]
+    groups, quantiles, values = pivot_quantiles(df, GROUP_KEYS)
+
+    probs = np.full((len(groups), len(LEVELS)), np.nan)
+    influmeter_index = np.full(len(groups), np.nan)
+    registry = load_threshold_registry()
+    seasons = groups["round"].map({forecasting_week: check_season(forecasting_week) 
+                                   for forecasting_week in groups["round"].unique()})
+    threshold_rows = registry.rows(seasons, groups["target"].astype(str), groups["luogo"].astype(str))
+    for target in groups.loc[threshold_rows < 0, "target"].astype(str).unique():
+        print(f"No MEM thresholds for target: {target}")
+
+    if len(groups) > 0:
+        # sets of published quantile levels: rows sharing one are evaluated together
+        patterns, pattern_of_row = np.unique(np.isnan(values), axis=0, return_inverse=True)
+        for pattern_id, missing in enumerate(patterns):
+            rows = (pattern_of_row.reshape(-1) == pattern_id) & (threshold_rows >= 0)
+            if not rows.any() or 0.5 not in quantiles[~missing]:
+                continue
+            edges = registry.edges[threshold_rows[rows]]
+            probs[rows] = band_probability_matrix(quantiles[~missing], values[rows][:, ~missing], edges)
+            influmeter_index[rows], _ = map_influmeter_index(values[rows, np.flatnonzero(quantiles == 0.5)[0]], edges)
+
+    keep = ~np.isnan(influmeter_index)
+    groups, probs, influmeter_index = groups[keep], probs[keep], influmeter_index[keep]
+
+    # one calendar lookup per (round, horizon)
+    keys = list(groups[["anno", "settimana", "orizzonte"]].itertuples(index=False, name=None))
+    dates = {key: target_week_dates(int(key[0]), int(key[1]), int(key[2])) for key in set(keys)}
+
+    rows = {"model_id": groups["model_id"].to_numpy(),
+            "horizon": groups["orizzonte"].to_numpy(dtype=int),
+            "start_date": [dates[key][0] for key in keys],
+            "end_date": [dates[key][1] for key in keys],
+            "location_id": groups["luogo"].astype(str).to_numpy(),
+            "target": groups["target"].astype(str).to_numpy()}
+    for i, level in enumerate(LEVELS):
+        rows[f"p_{level}"] = np.round(probs[:, i], 2)
+    rows["influmeter_index"] = np.round(influmeter_index, 2)
+    rows["round"] = groups["round"].to_numpy()
+
+    result = pd.DataFrame(rows, columns=OUTPUT_COLUMNS + ["round"])
+    result.sort_values(by=["round", "model_id", "target", "location_id", "horizon"], inplace=True)
+    result.reset_index(drop=True, inplace=True)
+    return result
 
-    rows = []
-    for (location, horizon), group in df.groupby(["luogo", "orizzonte"]):
-        year = int(group["anno"].iloc[0])
-        week = int(group["settimana"].iloc[0])
-        start_date, end_date = target_week_dates(year, week, int(horizon))
 
-        median_rows = group[group["id_valore"] == 0.5]
-        if median_rows.empty:
-            continue
-        median_value = median_rows["valore"].iloc[0]
-        influmeter_index, _ = get_influmeter_index(median_value, thresholds)
+def compute_influmeter(forecasting_week, data_root=None):
+    check_season(forecasting_week)
+    df = fetch_ensemble(forecasting_week, data_root)
+    df = df.assign(round=forecasting_week, model_id=MODEL_ID)
+    return influmeter_table(df)[OUTPUT_COLUMNS]
 
-        probs = compute_band_probabilities(
-            group["id_valore"].values, group["valore"].values, thresholds
-        )
 
-        rows.append({
-            "model_id": MODEL_ID,
-            "horizon": int(horizon),
-            "start_date": start_date,
-            "end_date": end_date,
-            "location_id": location,
-            "target": TARGET,
-            "p_baseline": round(probs["baseline"], 2),
-            "p_low": round(probs["low"], 2),
-            "p_medium": round(probs["medium"], 2),
-            "p_high": round(probs["high"], 2),
-            "p_very_high": round(probs["very_high"], 2),
-            "influmeter_index": round(influmeter_index, 2),
-        })
-
-    result = pd.DataFrame(rows, columns=[
-        "model_id", "horizon", "start_date", "end_date", "location_id",
-        "target", "p_baseline", "p_low", "p_medium", "p_high",
-        "p_very_high", "influmeter_index",
-    ])
-    result.sort_values(by=["location_id", "horizon"], inplace=True)
-    result.reset_index(drop=True, inplace=True)
-    return result
+def compute_influmeter_batch(rounds, models=(ENSEMBLE_MODEL,), targets=(TARGET,), data_root=None, workers=16, contents=None):
+    """
+    Compute the InfluMeter tables of several rounds, models and targets: 
+    every forecast file is loaded once and all groups are computed in one 
+    pass.
+
+    Parameters:
+    - contents (dict): (round, model) -> forecast file, if already loaded. (Defaults to None, i.e. load them).
+
+    Returns:
+    - dict: round -> InfluMeter table, for the rounds with at least one forecast.
+    """
+    for forecasting_week in rounds:
+        check_season(forecasting_week)
+    if contents is None:
+        contents = load_forecast_files(rounds, models, data_root=data_root, workers=workers)
+    contents = {file: content for file, content in contents.items() if file[0] in rounds}
+    result = influmeter_table(forecasts_frame(contents), targets=targets)
+    loaded = sorted({forecasting_week for forecasting_week, _ in contents})
+    return {forecasting_week: result.loc[result["round"] == forecasting_week, OUTPUT_COLUMNS].reset_index(drop=True)
+            for forecasting_week in loaded}
 
 
 def main():
     parser = argparse.ArgumentParser(
-        description="Compute the InfluMeter index and MEM band probabilities for a forecasting round."
+        description="Compute the InfluMeter index and MEM band probabilities for a forecasting round, "
+                    "or for a range of rounds, models and targets (batch mode)."
+    )
+    parser.add_argument("forecasting_week", nargs="?", help="Forecasting round id, e.g. 2026_09")
+    parser.add_argument("output_path", nargs="?", help="Path to write the output CSV to")
+    parser.add_argument(
+        "--data_root", "--data-root", default=None,
+        help="Local checkout or base URL of the Influcast data repository (default: GitHub)",
+    )
+    parser.add_argument("--rounds", default=None, help="Batch mode: range of rounds, e.g. 2025_45:2026_15")
+    parser.add_argument("--season", default=None, help="Batch mode: every round of a season, e.g. 2025-2026")
+    parser.add_argument("--models", nargs="+", default=[ENSEMBLE_MODEL], help="Batch mode: model folders")
+    parser.add_argument("--targets", nargs="+", default=[TARGET], help="Batch mode: targets")
+    parser.add_argument("--output_dir", default=".", help="Batch mode: folder of the <round>_influmeter.csv files")
+    parser.add_argument("--workers", type=int, default=16, help="Concurrent downloads")
+    parser.add_argument(
+        "--skip_cache", "--skip-cache", default=None,
+        help="JSON record of the written outputs; rounds whose inputs, thresholds and code are unchanged are skipped",
     )
-    parser.add_argument("forecasting_week", help="Forecasting round id, e.g. 2026_09")
-    parser.add_argument("output_path", help="Path to write the output CSV to")
     args = parser.parse_args()
 
+    batch = args.rounds is not None or args.season is not None
+    if not batch and (args.forecasting_week is None or args.output_path is None):
+        parser.error("forecasting_week and output_path are required, unless --rounds or --season is given")
+
     try:
-        df = compute_influmeter(args.forecasting_week)
+        if batch:
+            if args.rounds is not None:
+                weeks = rounds_in_range(args.rounds)
+            else:
+                weeks = load_season_calendar(args.season, args.data_root).year_weeks()
+            rounds = [f"{year}_{week:02d}" for year, week in weeks]
+            models, targets = args.models, args.targets
+            outputs = {forecasting_week: os.path.join(args.output_dir, f"{forecasting_week}_influmeter.csv")
+                       for forecasting_week in rounds}
+            contents = load_forecast_files(rounds, models, data_root=args.data_root, workers=args.workers)
+        else:
+            rounds, models, targets = [args.forecasting_week], [ENSEMBLE_MODEL], [TARGET]
+            outputs = {args.forecasting_week: args.output_path}
+            check_season(args.forecasting_week)
+            contents = {(args.forecasting_week, ENSEMBLE_MODEL): 
+                        fetch_forecast_file(DataSource(args.data_root), ENSEMBLE_MODEL, args.forecasting_week)}
+
+        # skip the rounds whose output is up to date
+        skip_cache = SkipCache(args.skip_cache) if args.skip_cache is not None else None
+        keys = {}
+        if skip_cache is not None:
+            keys = {forecasting_week: SkipCache.key([contents.get((forecasting_week, model)) for model in models], 
+                                                    check_season(forecasting_week), models, targets)
+                    for forecasting_week in rounds}
+            unchanged = [forecasting_week for forecasting_week in rounds 
+                         if skip_cache.is_current(outputs[forecasting_week], keys[forecasting_week])]
+            rounds = [forecasting_week for forecasting_week in rounds if forecasting_week not in unchanged]
+            for forecasting_week in unchanged:
+                print(f"Unchanged: {outputs[forecasting_week]}")
+
+        tables = compute_influmeter_batch(rounds, models, targets, contents=contents) if len(rounds) > 0 else {}
     except (RuntimeError, ValueError) as exc:
         print(f"Error: {exc}", file=sys.stderr)
         sys.exit(1)
 
-    df.to_csv(args.output_path, index=False)
-    print(f"Wrote {len(df)} rows to {args.output_path}")
+    for forecasting_week, df in tables.items():
+        os.makedirs(os.path.dirname(os.path.abspath(outputs[forecasting_week])), exist_ok=True)
+        df.to_csv(outputs[forecasting_week], index=False)
+        print(f"Wrote {len(df)} rows to {outputs[forecasting_week]}")
+        if skip_cache is not None:
+            skip_cache.record(outputs[forecasting_week], keys[forecasting_week])
+    if skip_cache is not None:
+        skip_cache.save()
+
+    # lets the workflow skip validation and publishing of an unchanged round
+    env_file = os.environ.get("GITHUB_OUTPUT")
+    if env_file:
+        with open(env_file, "a") as outenv:
+            outenv.write(f"changed={'true' if len(tables) > 0 else 'false'}\n")
 
 
 if __name__ == "__main__":
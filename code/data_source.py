@@ -0,0 +1,116 @@
+"""
+Access to the files of the Influcast data repository.
+
+Files are addressed by their path in the repository (e.g.
+"supporting-files/settimane_2025-2026.csv"). The data root is either a
+local checkout, read straight from disk, or a base URL, read over HTTP
+through one pooled session and the on-disk HTTP cache (see HTTPCache.from_env
+for its settings).
+"""
+
+import io
+import json
+import os
+import re
+
+import pandas as pd
+import requests
+
+from http_utils import HTTPCache, fetch, make_session
+
+DEFAULT_DATA_ROOT = "https://raw.githubusercontent.com/Predizioni-Epidemiologiche-Italia/Influcast/main"
+
+
+class DataSource:
+    """
+    Files of the data repository under a local path or a base URL.
+    """
+
+    def __init__(self, root=None, timeout=30, retries=3, pool_size=16, cache=None):
+        self.root = DEFAULT_DATA_ROOT if root is None else str(root).rstrip("/")
+        self.remote = self.root.startswith(("http://", "https://"))
+        self.timeout = timeout
+        self.retries = retries
+        self.session = make_session(pool_size=pool_size) if self.remote else None
+        # None: the cache configured by the environment; False: no cache
+        if cache is None and self.remote:
+            cache = HTTPCache.from_env()
+        self.cache = cache or None
+
+    def location(self, path):
+        """
+        URL or local path of a file of the repository.
+        """
+        if self.remote:
+            return self.root + "/" + path
+        return os.path.join(self.root, *path.split("/"))
+
+    def read_bytes(self, path):
+        """
+        Content of a file of the repository, or None if it does not exist.
+        """
+        if self.remote:
+            return fetch(self.session, self.location(path), timeout=self.timeout, retries=self.retries, cache=self.cache)
+        try:
+            with open(self.location(path), "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def file(self, path):
+        """
+        Local file (a local checkout) or in-memory buffer with the content 
+        of a file of the repository; raises FileNotFoundError if it does 
+        not exist.
+        """
+        if self.remote:
+            # in memory even when cached: the cached body may be evicted by other threads
+            content = self.read_bytes(path)
+            source = None if content is None else io.BytesIO(content)
+        else:
+            source = self.location(path) if os.path.exists(self.location(path)) else None
+        if source is None:
+            raise FileNotFoundError(f"File not found: {self.location(path)}")
+        return source
+
+    def read_csv(self, path, **kwargs):
+        """
+        Read a CSV file of the repository; raises FileNotFoundError if it does not exist.
+        """
+        return pd.read_csv(self.file(path), **kwargs)
+
+    def list_files(self, directory):
+        """
+        Paths of the files under a directory of the repository.
+
+        A local checkout is walked; a raw GitHub root is listed with a single 
+        request to the git trees API, authenticated with GITHUB_TOKEN when it 
+        is set. Raises RuntimeError if the files cannot be listed (other base 
+        URLs, API errors such as rate limiting, truncated listings).
+
+        Returns:
+        - list: repository paths, e.g. "previsioni/ISI-GLEAM/2026_05.csv".
+        """
+        directory = directory.strip("/")
+        if not self.remote:
+            base = self.location(directory)
+            return sorted(os.path.relpath(os.path.join(folder, name), self.root).replace(os.sep, "/")
+                          for folder, _, names in os.walk(base) for name in names)
+
+        match = re.match(r"https://raw\.githubusercontent\.com/([^/]+)/([^/]+)/(.+)$", self.root)
+        if match is None:
+            raise RuntimeError(f"Cannot list files of {self.root}; use a local checkout")
+        owner, repo, ref = match.groups()
+        url = f"https://api.github.com/repos/{owner}/{repo}/git/trees/{ref}:{directory}?recursive=1"
+        token = os.environ.get("GITHUB_TOKEN")
+        headers = {"Authorization": f"Bearer {token}"} if token else None
+        try:
+            content = fetch(self.session, url, timeout=self.timeout, retries=self.retries, cache=self.cache, headers=headers)
+        except requests.RequestException as exc:
+            raise RuntimeError(f"Cannot list files of {self.root}: {exc}") from exc
+        if content is None:
+            return []
+        tree = json.loads(content)
+        if tree.get("truncated"):
+            raise RuntimeError(f"Truncated file listing of {directory} in {self.root}; use a local checkout")
+        return sorted(f"{directory}/{item['path']}" for item in tree["tree"] if item["type"] == "blob")
@@ -0,0 +1,148 @@
+"""
+Shared helpers for tools that emit Influcast forecast files.
+
+Forecast files are long-format CSVs with one row per location, target,
+quantile level and horizon (columns: anno, settimana, luogo, tipo_valore,
+id_valore, orizzonte, valore, target). read_forecast_csv reads them with
+an explicit schema instead of type inference.
+"""
+
+import numpy as np
+import pandas as pd
+
+FORECAST_COLUMNS = ["anno", "settimana", "luogo", "tipo_valore",
+                    "id_valore", "orizzonte", "valore", "target"]
+
+# location, target and value type are categorical; anno is int32 so that
+# anno * 100 + settimana does not overflow, id_valore stays float64 so that
+# quantile levels compare exactly with 0.5, 0.025, ..., and valore stays
+# float64 so that values on a MEM threshold (2 decimals) stay on it
+FORECAST_DTYPES = {"anno": "int32", 
+                   "settimana": "int8", 
+                   "luogo": "category", 
+                   "tipo_valore": "category", 
+                   "id_valore": "float64", 
+                   "orizzonte": "int8", 
+                   "valore": "float64", 
+                   "target": "category"}
+
+
+def csv_engine():
+    """
+    The pyarrow CSV parser when pyarrow is installed, otherwise pandas' C parser.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return "c"
+    return "pyarrow"
+
+
+def pad_location_codes(luogo):
+    """
+    Zero-pad numeric region codes ("1" -> "01") of a categorical luogo column.
+    """
+    categories = luogo.cat.categories.astype(str)
+    padded = categories.str.zfill(2)
+    if padded.equals(categories):
+        return luogo
+    if padded.is_unique:
+        return luogo.cat.rename_categories(padded)
+    # both "1" and "01" present: merge them
+    return luogo.astype(str).str.zfill(2).astype("category")
+
+
+def read_forecast_csv(filepath_or_buffer, value_dtype=None, **kwargs):
+    """
+    Read a forecast file with the FORECAST_DTYPES schema.
+
+    Parameters:
+    - filepath_or_buffer (str or file-like): forecast CSV
+    - value_dtype (str): dtype of valore, e.g. "float32" for large reads 
+      that tolerate rounding. (Defaults to float64).
+
+    Returns:
+    - pd.DataFrame: forecasts with categorical luogo, target and tipo_valore.
+    """
+    dtypes = dict(FORECAST_DTYPES)
+    if value_dtype is not None:
+        dtypes["valore"] = value_dtype
+    # categories are parsed as strings, so "01" is not read as 1
+    df = pd.read_csv(filepath_or_buffer, dtype=dtypes, engine=csv_engine(), **kwargs)
+    df["luogo"] = pad_location_codes(df["luogo"])
+    return df
+
+
+def format_forecast_table(anno, settimana, luoghi, targets, quantiles, values, horizons=None):
+    """
+    Build the long-format forecast table of a round from a quantile cube.
+
+    Rows are ordered by series, then quantile level, then horizon, and the
+    whole table is built with repeat/tile in one shot.
+
+    Parameters:
+    - anno (int): year of the forecasting round
+    - settimana (int): week of the forecasting round
+    - luoghi (list): location code of each series
+    - targets (list): target of each series
+    - quantiles (list): quantile levels
+    - values (np.ndarray): quantile values with shape (series, len(quantiles), horizon)
+    - horizons (list): horizon of each step. (Defaults to 1, ..., horizon).
+
+    Returns:
+    - pd.DataFrame: forecast table with FORECAST_COLUMNS.
+    """
+    values = np.asarray(values, dtype=float)
+    nseries, nquantiles, nhorizons = values.shape
+    if horizons is None:
+        horizons = np.arange(1, nhorizons + 1)
+
+    rows_per_series = nquantiles * nhorizons
+    nrows = nseries * rows_per_series
+
+    return pd.DataFrame(data={
+        "anno": np.full(nrows, int(anno)),
+        "settimana": np.full(nrows, int(settimana)),
+        "luogo": np.repeat(np.asarray(luoghi, dtype=object), rows_per_series),
+        "tipo_valore": np.full(nrows, "quantile", dtype=object),
+        "id_valore": np.tile(np.repeat(np.asarray(quantiles, dtype=float), nhorizons), nseries),
+        "orizzonte": np.tile(np.asarray(horizons, dtype=int), nseries * nquantiles),
+        "valore": values.reshape(-1),
+        "target": np.repeat(np.asarray(targets, dtype=object), rows_per_series),
+    }, columns=FORECAST_COLUMNS)
+
+
+def interp_rows(x, xp, fp, left=None, right=None):
+    """
+    Row-wise np.interp: piecewise-linear interpolation of many functions at once.
+
+    Used to evaluate the CDFs implied by sets of predictive quantiles (and
+    their inverses) for all groups in one batched call.
+
+    Parameters:
+    - x (np.ndarray): points with shape (rows, npoints), or (npoints,) shared by all rows
+    - xp (np.ndarray): knots with shape (rows, nknots), non-decreasing along each row
+    - fp (np.ndarray): function values at the knots, same shape as xp
+    - left (float): value below the first knot. (Defaults to fp[:, 0]).
+    - right (float): value above the last knot. (Defaults to fp[:, -1]).
+
+    Returns:
+    - np.ndarray: interpolated values with shape (rows, npoints).
+    """
+    xp = np.asarray(xp, dtype=float)
+    fp = np.asarray(fp, dtype=float)
+    x = np.broadcast_to(np.asarray(x, dtype=float), (xp.shape[0], np.shape(x)[-1]))
+
+    # segment [xp[lo], xp[lo + 1]] containing each point
+    idx = (xp[:, None, :] <= x[:, :, None]).sum(axis=2)
+    lo = np.clip(idx - 1, 0, xp.shape[1] - 2)
+    x_lo, x_hi = np.take_along_axis(xp, lo, axis=1), np.take_along_axis(xp, lo + 1, axis=1)
+    f_lo, f_hi = np.take_along_axis(fp, lo, axis=1), np.take_along_axis(fp, lo + 1, axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = np.where(x_hi > x_lo, (f_hi - f_lo) / (x_hi - x_lo), 0.0)
+        values = f_lo + (np.minimum(x, x_hi) - x_lo) * slope
+
+    values = np.where(x < xp[:, :1], fp[:, :1] if left is None else left, values)
+    values = np.where(x > xp[:, -1:], fp[:, -1:] if right is None else right, values)
+    return values
@@ -0,0 +1,256 @@
+"""
+Shared HTTP helpers for the hub scripts.
+
+All requests of a script go through one pooled session (keep-alive), with
+per-request timeouts. A 404 is reported as a missing file, while connection
+errors, timeouts and 429/5xx responses are retried with exponential backoff.
+
+Downloads can go through an on-disk HTTPCache: entries younger than the TTL
+are served without a request, older ones are revalidated with
+If-None-Match/If-Modified-Since (a 304 costs no body), and the least
+recently used entries are evicted beyond a size bound.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+TRANSIENT_STATUS = {429, 500, 502, 503, 504}
+
+
+def make_session(pool_size=16):
+    """
+    Create a requests session keeping up to `pool_size` connections alive per host.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class HTTPCache:
+    """
+    On-disk cache of HTTP responses, keyed by URL.
+
+    Each entry is a body file and a JSON file with the validators (ETag,
+    Last-Modified) and the time the entry was last checked against the
+    server. Reads refresh the body modification time, which orders the LRU
+    eviction.
+
+    Parameters:
+    - directory (str): cache directory, created if missing.
+    - ttl (float): seconds an entry is served without revalidation. (Defaults to 0, always revalidate).
+    - max_bytes (int): size bound of the cached bodies. (Defaults to 512 MB).
+    """
+
+    def __init__(self, directory, ttl=0, max_bytes=512 * 2 ** 20):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        """
+        Cache configured by HUB_CACHE_DIR (empty disables it), HUB_CACHE_TTL 
+        (seconds) and HUB_CACHE_MAX_MB; None if disabled.
+        """
+        directory = os.environ.get("HUB_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "hub-tools"))
+        if not directory:
+            return None
+        return cls(directory, 
+                   ttl=float(os.environ.get("HUB_CACHE_TTL", 0)), 
+                   max_bytes=int(float(os.environ.get("HUB_CACHE_MAX_MB", 512)) * 2 ** 20))
+
+    def paths(self, url):
+        """
+        Body and metadata file of the entry of a URL.
+        """
+        key = os.path.join(self.directory, hashlib.sha256(url.encode()).hexdigest())
+        return key + ".body", key + ".json"
+
+    def lookup(self, url):
+        """
+        Metadata of the entry of a URL, or None if not cached.
+        """
+        body, meta = self.paths(url)
+        try:
+            with open(meta) as file:
+                entry = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return None
+        return entry if os.path.exists(body) else None
+
+    def is_fresh(self, entry):
+        return time.time() - entry["checked"] < self.ttl
+
+    def validators(self, entry):
+        """
+        Conditional request headers revalidating an entry.
+        """
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def _write(self, path, content):
+        # atomic replace, so that concurrent readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as file:
+            file.write(content)
+        os.replace(tmp, path)
+
+    def store(self, url, response):
+        """
+        Store a 200 response; returns the body file.
+        """
+        body, meta = self.paths(url)
+        self._write(body, response.content)
+        self._write(meta, json.dumps({"url": url, 
+                                      "etag": response.headers.get("ETag"), 
+                                      "last_modified": response.headers.get("Last-Modified"), 
+                                      "checked": time.time()}).encode())
+        self.evict(keep=body)
+        return body
+
+    def touch(self, url, entry=None, revalidated=False):
+        """
+        Mark an entry as used (and as checked, after a 304); returns the body 
+        file, or None if it was evicted in the meantime.
+        """
+        body, meta = self.paths(url)
+        if revalidated:
+            self._write(meta, json.dumps(dict(entry, checked=time.time())).encode())
+        try:
+            os.utime(body)
+        except FileNotFoundError:
+            return None
+        return body
+
+    def read(self, url, entry=None, revalidated=False):
+        """
+        Content of an entry, marked as used (see touch); None if it was 
+        evicted in the meantime, e.g. by a download on another thread.
+        """
+        body = self.touch(url, entry, revalidated=revalidated)
+        if body is None:
+            return None
+        try:
+            with open(body, "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def evict(self, keep=None):
+        """
+        Remove the least recently used entries beyond the size bound. The 
+        body file `keep` counts towards the bound but is never removed.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".body"):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name[:-len(".body")]))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if os.path.join(self.directory, key + ".body") == keep:
+                continue
+            for suffix in (".body", ".json"):
+                try:
+                    os.remove(os.path.join(self.directory, key + suffix))
+                except FileNotFoundError:
+                    pass
+            total -= size
+
+
+def _get(session, url, headers=None, timeout=30, retries=3, backoff=1.0):
+    """
+    GET with retries of transient failures; None on 404.
+    """
+    error = None
+    for attempt in range(retries + 1):
+        try:
+            response = session.get(url, headers=headers, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as exc:
+            error = exc
+        else:
+            if response.status_code == 404:
+                return None
+            if response.status_code not in TRANSIENT_STATUS:
+                response.raise_for_status()
+                return response
+            error = f"HTTP {response.status_code}"
+
+        if attempt < retries:
+            time.sleep(backoff * 2 ** attempt)
+
+    raise RuntimeError(f"Could not fetch {url} after {retries + 1} attempts: {error}")
+
+
+def fetch_cached(session, url, cache, timeout=30, retries=3, backoff=1.0, headers=None):
+    """
+    Download a file through the cache.
+
+    Returns:
+    - bytes: file content, or None if the file does not exist (404).
+    """
+    entry = cache.lookup(url)
+    if entry is not None and cache.is_fresh(entry):
+        content = cache.read(url)
+        if content is not None:
+            return content
+        # evicted since the lookup
+        entry = None
+
+    conditional = dict(headers or {}, **(cache.validators(entry) if entry is not None else {}))
+    response = _get(session, url, headers=conditional, timeout=timeout, retries=retries, backoff=backoff)
+    if response is None:
+        return None
+    if response.status_code == 304 and entry is not None:
+        content = cache.read(url, entry, revalidated=True)
+        if content is not None:
+            return content
+        # evicted since the lookup: download the body unconditionally
+        response = _get(session, url, headers=headers, timeout=timeout, retries=retries, backoff=backoff)
+        if response is None:
+            return None
+    # serve the downloaded content, the stored body may be evicted by other threads
+    cache.store(url, response)
+    return response.content
+
+
+def fetch(session, url, timeout=30, retries=3, backoff=1.0, cache=None, headers=None):
+    """
+    Download a file.
+
+    Parameters:
+    - session (requests.Session): pooled session
+    - url (str): file URL
+    - timeout (float): per-request timeout in seconds. (Defaults to 30).
+    - retries (int): retries of transient failures. (Defaults to 3).
+    - backoff (float): delay before the first retry, doubled at each retry. (Defaults to 1).
+    - cache (HTTPCache): on-disk cache, or None to always download. (Defaults to None).
+    - headers (dict): extra request headers, e.g. Authorization. (Defaults to None).
+
+    Returns:
+    - bytes: file content, or None if the file does not exist (404).
+    """
+    if cache is not None:
+        return fetch_cached(session, url, cache, timeout=timeout, retries=retries, backoff=backoff, headers=headers)
+
+    response = _get(session, url, headers=headers, timeout=timeout, retries=retries, backoff=backoff)
+    return None if response is None else response.content
@@ -4,29 +4,15 @@ import os
 from isoweek import Week
 from datetime import date
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 
-parser = argparse.ArgumentParser()
-parser.add_argument('--season')
-parser.add_argument('--targets', default="ARI ARI+_FLU_A ARI+_FLU_B")
-parser.add_argument('--measure', default="incidenza")
-parser.add_argument('--symmetrize', default=True)
-parser.add_argument('--nsamples', default=10000)
-parser.add_argument('--horizon', default=4)
-parser.add_argument('--team_abbr', default="Influcast")
-parser.add_argument('--model_abbr', default="quantileBaseline")
-
-args = parser.parse_args()
-season = str(args.season)
-targets = str(args.targets)
-horizon = int(args.horizon)
-symmetrize = bool(args.symmetrize)
-nsamples = int(args.nsamples)
-team_abbr = str(args.team_abbr)
-model_abbr = str(args.model_abbr)
-measure = str(args.measure)
+from data_source import DataSource
+from forecast_utils import csv_engine, format_forecast_table
+from season_calendar import load_season_calendar, parse_rounds
 
 
 basin_ids_plus = {'italia': "IT"}
+# the position of a basin keys its random streams, so only append
 basin_ids = {'italia': "IT",
             'abruzzo': "01",
             'basilicata': "02",
@@ -50,11 +36,23 @@ basin_ids = {'italia': "IT",
             'valle_d_aosta': "20",
             'veneto': "21"}
 
+# targets with a baseline; the position of a target keys its random streams, so only append
+SERIES_TARGETS = ["ARI", "ARI+_FLU_A", "ARI+_FLU_B"]
+
+# surveillance files: anno, settimana, incidenza
+TRUTH_DTYPES = {"anno": "int32", "settimana": "int8", "incidenza": "float64"}
+
+# quantile levels published in the hub forecast files
+QUANTILES = [0.01, 0.025, 0.05, 0.1, 0.15, 0.2, 0.25, 0.3,
+             0.35, 0.4, 0.45, 0.5, 0.55, 0.6, 0.65, 0.7, 
+             0.75, 0.8, 0.85, 0.9, 0.95, 0.975, 0.99]
+
 def quantile_baseline(data : np.ndarray, 
                       nsamples : int, 
                       horizon : int, 
                       symmetrize : bool = True, 
-                      include_training : bool = True) -> np.ndarray:
+                      include_training : bool = True, 
+                      rng = None) -> np.ndarray:
     
     """
     Compute baseline forecasts
@@ -65,70 +63,394 @@ def quantile_baseline(data : np.ndarray,
     - horizon (int): forecasting horizon in steps 
     - symmetrize (bool): if True one-step differences are symmetrized. (Defaults to True).
     - include_training (bool): if True includes also training data in returned array. (Defaults to True).
+    - rng: np.random.Generator, or seed for np.random.default_rng. (Defaults to None, i.e. unseeded).
 
     Returns:
     -  np.ndarray: forecast samples.
     """
 
+    rng = np.random.default_rng(rng)
+
     # compute one step changes 
     diffs = np.diff(data)
 
     if symmetrize  == True: 
         diffs = np.concatenate((diffs, -diffs))
 
-    # resample forecasts
+    # resample all forecast trajectories at once
+    sampled_diffs = diffs[rng.integers(0, len(diffs), size=(nsamples, horizon))]
+    forecasts = np.cumsum(sampled_diffs, axis=1, dtype=float)
+    forecasts += data[-1]
+
+    # fix negative values
+    np.maximum(forecasts, 0, out=forecasts)
+
     if include_training == True:
-        forecast_samples = np.zeros((nsamples, len(data) + horizon))
+        training = np.broadcast_to(np.asarray(data, dtype=float), (nsamples, len(data)))
+        forecast_samples = np.hstack((training, forecasts))
     else:
-        forecast_samples = np.zeros((nsamples, horizon))
+        forecast_samples = forecasts
+
+    return forecast_samples
+
+
+def quantile_baseline_batch(series : list, 
+                            nsamples : int, 
+                            horizon : int, 
+                            symmetrize : bool = True, 
+                            seeds : list = None) -> np.ndarray:
+    
+    """
+    Compute baseline forecasts for several training series at once
+
+    Series may have different lengths: their one-step differences are 
+    padded into a single matrix and each series only draws from its own 
+    (unpadded) differences. Each series draws from its own random stream, 
+    so its samples do not depend on which other series are in the batch.
+
+    Parameters:
+    - series (list): training data of each series (1-D arrays, at least 2 points each)
+    - nsamples (int): number of forecasting samples
+    - horizon (int): forecasting horizon in steps 
+    - symmetrize (bool): if True one-step differences are symmetrized. (Defaults to True).
+    - seeds (list): one np.random.SeedSequence (or seed) per series. (Defaults to None, i.e. unseeded).
+
+    Returns:
+    -  np.ndarray: forecast samples with shape (len(series), nsamples, horizon).
+    """
+
+    # compute one step changes, padded to the longest series
+    diffs = [np.diff(np.asarray(data, dtype=float)) for data in series]
+    if symmetrize == True:
+        diffs = [np.concatenate((d, -d)) for d in diffs]
+
+    lengths = np.array([len(d) for d in diffs])
+    padded_diffs = np.zeros((len(diffs), lengths.max()))
+    for i, d in enumerate(diffs):
+        padded_diffs[i, :len(d)] = d
+    last_values = np.array([data[-1] for data in series], dtype=float)
+
+    # draw the resampling indices from the stream of each series
+    if seeds is None:
+        seeds = np.random.SeedSequence().spawn(len(series))
+    idx = np.empty((len(series), nsamples, horizon), dtype=np.intp)
+    for i, seed in enumerate(seeds):
+        idx[i] = np.random.default_rng(seed).integers(0, lengths[i], size=(nsamples, horizon))
+
+    # resample all trajectories of all series at once
+    sampled_diffs = np.take_along_axis(padded_diffs[:, None, :], idx.reshape(len(series), 1, -1), axis=2)
+    forecasts = np.cumsum(sampled_diffs.reshape(len(series), nsamples, horizon), axis=2)
+    forecasts += last_values[:, None, None]
+
+    # fix negative values
+    np.maximum(forecasts, 0, out=forecasts)
+
+    return forecasts
+
+
+def exact_quantile_baseline(data : np.ndarray, 
+                            horizon : int, 
+                            symmetrize : bool = True, 
+                            quantiles : np.ndarray = QUANTILES, 
+                            resolution : float = 1e-3) -> np.ndarray:
+    
+    """
+    Compute baseline forecast quantiles without sampling
+
+    The forecast at step h is the last observation plus the sum of h i.i.d. 
+    draws from the (symmetrized) one-step differences. Its distribution is 
+    the h-fold convolution of the empirical distribution of the differences, 
+    computed by FFT after snapping the differences onto a lattice of step 
+    `resolution` (the quantile error is at most h * resolution / 2). 
+    Negative values are floored at zero, which maps quantiles through max(., 0).
+
+    Parameters:
+    - data (np.ndarray): training data 
+    - horizon (int): forecasting horizon in steps 
+    - symmetrize (bool): if True one-step differences are symmetrized. (Defaults to True).
+    - quantiles (np.ndarray): quantile levels to compute. (Defaults to QUANTILES).
+    - resolution (float): lattice step of the one-step differences. (Defaults to 1e-3).
+
+    Returns:
+    -  np.ndarray: forecast quantiles with shape (len(quantiles), horizon).
+    """
+
+    # compute one step changes 
+    diffs = np.diff(np.asarray(data, dtype=float))
+
+    if symmetrize  == True: 
+        diffs = np.concatenate((diffs, -diffs))
 
-    for i in range(nsamples): 
-        sampled_diffs = diffs[np.random.randint(0, len(diffs), size=horizon)]
-        forecasts = np.cumsum(sampled_diffs)
+    # empirical distribution of the differences on the lattice
+    steps = np.round(diffs / resolution).astype(np.int64)
+    offset = steps.min()
+    pmf = np.bincount(steps - offset) / len(steps)
+
+    # all convolution powers share one transform
+    nfft = horizon * (len(pmf) - 1) + 1
+    pmf_fft = np.fft.rfft(pmf, nfft)
+
+    levels = np.asarray(quantiles, dtype=float)
+    forecast_quantiles = np.zeros((len(levels), horizon))
+    for h in range(1, horizon + 1):
+        size = h * (len(pmf) - 1) + 1
+        pmf_h = np.clip(np.fft.irfft(pmf_fft ** h, nfft)[:size], 0, None)
+        cdf = np.cumsum(pmf_h)
+        cdf /= cdf[-1]
+
+        # smallest lattice point whose cdf reaches each level
+        idx = np.minimum(np.searchsorted(cdf, levels - 1e-9, side="left"), size - 1)
+        forecast_quantiles[:, h - 1] = data[-1] + (h * offset + idx) * resolution
+
+    # fix negative values
+    np.maximum(forecast_quantiles, 0, out=forecast_quantiles)
+
+    return forecast_quantiles
+
+
+def streaming_quantile_baseline(data : np.ndarray, 
+                                nsamples : int, 
+                                horizon : int, 
+                                symmetrize : bool = True, 
+                                quantiles : np.ndarray = QUANTILES, 
+                                chunk_size : int = 100000, 
+                                nbins : int = 4096, 
+                                rng = None) -> tuple:
+    
+    """
+    Compute baseline forecast quantiles with memory independent of nsamples
+
+    Samples are generated in chunks of `chunk_size` and folded into a 
+    fixed-bin histogram per horizon. The bins span the exact range reachable 
+    at each step (last value plus h times the smallest/largest difference), 
+    and the mass floored at zero is counted exactly, so the only error is 
+    the position of a quantile within its bin: it differs from the quantile 
+    of the same samples by less than one bin width.
+
+    Parameters:
+    - data (np.ndarray): training data 
+    - nsamples (int): number of forecasting samples
+    - horizon (int): forecasting horizon in steps 
+    - symmetrize (bool): if True one-step differences are symmetrized. (Defaults to True).
+    - quantiles (np.ndarray): quantile levels to compute. (Defaults to QUANTILES).
+    - chunk_size (int): number of samples generated at a time. (Defaults to 100000).
+    - nbins (int): number of histogram bins per horizon. (Defaults to 4096).
+    - rng: np.random.Generator, or seed for np.random.default_rng. (Defaults to None, i.e. unseeded).
+
+    Returns:
+    -  tuple: forecast quantiles with shape (len(quantiles), horizon) and error bound of each horizon.
+    """
+
+    rng = np.random.default_rng(rng)
+
+    # compute one step changes 
+    diffs = np.diff(np.asarray(data, dtype=float))
+
+    if symmetrize  == True: 
+        diffs = np.concatenate((diffs, -diffs))
+
+    # exact range of each horizon step
+    steps = np.arange(1, horizon + 1)
+    lower = np.maximum(data[-1] + steps * diffs.min(), 0)
+    upper = np.maximum(data[-1] + steps * diffs.max(), 0)
+    width = np.maximum(upper - lower, np.finfo(float).tiny) / nbins
+
+    counts = np.zeros(horizon * nbins, dtype=np.int64)
+    zero_counts = np.zeros(horizon, dtype=np.int64)
+    for start in range(0, nsamples, chunk_size):
+        size = min(chunk_size, nsamples - start)
+        forecasts = np.cumsum(diffs[rng.integers(0, len(diffs), size=(size, horizon))], axis=1)
         forecasts += data[-1]
 
-        # fix negative values
-        forecasts[forecasts<0] = 0 
+        # values floored at zero are counted apart
+        is_zero = forecasts <= 0
+        zero_counts += is_zero.sum(axis=0)
 
-        if include_training:
-            forecast_samples[i] = np.concatenate((data, forecasts))
-        else:
-            forecast_samples[i] = forecasts
+        bins = np.clip(((forecasts - lower) / width).astype(np.int64), 0, nbins - 1)
+        bins += np.arange(horizon) * nbins
+        counts += np.bincount(bins[~is_zero], minlength=horizon * nbins)
 
-    return forecast_samples
+    counts = counts.reshape(horizon, nbins)
+
+    # rank of the samples interpolated by np.quantile
+    position = np.asarray(quantiles, dtype=float) * (nsamples - 1)
+    rank_lower = np.floor(position)
+    rank_upper = np.minimum(rank_lower + 1, nsamples - 1)
+    frac = position - rank_lower
+
+    forecast_quantiles = np.zeros((len(position), horizon))
+    for h in range(horizon):
+        cum = np.concatenate(([zero_counts[h]], zero_counts[h] + np.cumsum(counts[h])))
+
+        def value_at(rank):
+            # zero mass first, then samples spread evenly within their bin
+            j = np.searchsorted(cum, rank, side="right")
+            b = np.maximum(j - 1, 0)
+            in_bin = (rank - cum[np.maximum(j - 1, 0)] + 0.5) / np.maximum(counts[h][b], 1)
+            return np.where(j == 0, 0.0, lower[h] + (b + in_bin) * width[h])
+
+        value_lower, value_upper = value_at(rank_lower), value_at(rank_upper)
+        forecast_quantiles[:, h] = value_lower + (value_upper - value_lower) * frac
+
+    return forecast_quantiles, width
+
+
+def sorted_quantiles(sorted_samples : np.ndarray, 
+                     quantiles : np.ndarray, 
+                     axis : int = 0) -> np.ndarray:
+    """
+    Read several quantiles off samples that are already sorted along `axis`.
+
+    Uses the same linear interpolation as np.quantile, so the samples are 
+    sorted once for all the requested levels.
+
+    Parameters:
+    - sorted_samples (np.ndarray): samples sorted along `axis`.
+    - quantiles (np.ndarray): quantile levels in [0, 1].
+    - axis (int): samples axis, replaced by the quantile axis in the output. (Defaults to 0).
+
+    Returns:
+    - np.ndarray: quantile values.
+    """
+
+    n = sorted_samples.shape[axis]
+    position = np.asarray(quantiles, dtype=float) * (n - 1)
+    lower = np.floor(position).astype(int)
+    upper = np.minimum(lower + 1, n - 1)
+
+    shape = [1] * sorted_samples.ndim
+    shape[axis] = len(position)
+    frac = (position - lower).reshape(shape)
+
+    values_lower = np.take(sorted_samples, lower, axis=axis)
+    values_upper = np.take(sorted_samples, upper, axis=axis)
+    return values_lower + (values_upper - values_lower) * frac
 
 
 def compute_quantiles(samples : np.ndarray, 
-                      quantiles: np.ndarray = np.arange(0.01, 1.0, 0.01)) -> pd.DataFrame:
+                      quantiles: np.ndarray = np.arange(0.01, 1.0, 0.01), 
+                      extra_measures : bool = True) -> pd.DataFrame:
     """
     Compute quantiles and aggregated measures from the given samples.
 
+    Samples are sorted once and all levels are interpolated in a single call.
+
     Parameters:
     - samples (np.ndarray): Array of samples.
     - quantiles (np.ndarray): Array of quantiles to compute. Default is np.arange(0.01, 1.0, 0.01).
+    - extra_measures (bool): if True adds the 0.025 and 0.975 quantiles, min and max. (Defaults to True).
 
     Returns:
     - pd.DataFrame: DataFrame containing the computed quantiles and aggregated measures.
     """
 
-    df_samples = pd.DataFrame() 
-    for q in quantiles:
-        df_samples[str(np.round(q, 2))] = np.quantile(samples, axis=0, q=np.round(q, 2))
-    
-    # additional quantiles and aggregated measures
-    df_samples["0.025"] = np.quantile(samples, axis=0, q=0.025)
-    df_samples["0.975"] = np.quantile(samples, axis=0, q=0.975)
-    df_samples["min"] = np.min(samples, axis=0)
-    df_samples["max"] = np.max(samples, axis=0)
+    levels = [float(q) for q in np.round(quantiles, 3)]
+    if extra_measures: 
+        levels += [q for q in (0.025, 0.975) if q not in levels]
+
+    sorted_samples = np.sort(samples, axis=0)
+    values = sorted_quantiles(sorted_samples, levels, axis=0)
+
+    columns = {str(q): values[i] for i, q in enumerate(levels)}
+    if extra_measures:
+        columns["min"] = sorted_samples[0]
+        columns["max"] = sorted_samples[-1]
+
+    return pd.DataFrame(data=columns)
+
 
-    return df_samples
+def compute_quantile_table(samples : np.ndarray, 
+                           quantiles : np.ndarray = QUANTILES) -> np.ndarray:
+    """
+    Compute quantiles of a (series, nsamples, horizon) sample cube.
+
+    Parameters:
+    - samples (np.ndarray): sample cube, as returned by quantile_baseline_batch.
+    - quantiles (np.ndarray): quantile levels to compute. (Defaults to QUANTILES).
+
+    Returns:
+    - np.ndarray: quantile table with shape (series, len(quantiles), horizon).
+    """
+
+    return sorted_quantiles(np.sort(samples, axis=1), quantiles, axis=1)
+
+
+def series_seed_sequences(seed, 
+                          year_forecast, 
+                          week_forecast, 
+                          series_keys):
+    """
+    Spawn one independent random stream per series of a forecasting round.
+
+    Streams are keyed by the seed, the round and the identity of the series 
+    (its target in SERIES_TARGETS and its basin in basin_ids), so a given 
+    series of a given round is always sampled the same way for the same 
+    seed, whatever other series are forecast with it.
+
+    Parameters:
+    - seed (int): root seed (None for fresh OS entropy)
+    - year_forecast (int): year of the forecasting round
+    - week_forecast (int): week of the forecasting round
+    - series_keys (list): (target, basin_name) of each series
+
+    Returns:
+    - list: np.random.SeedSequence of each series.
+    """
+
+    root = np.random.SeedSequence(seed)
+    basins = list(basin_ids)
+    seeds = []
+    for target, basin_name in series_keys:
+        if target not in SERIES_TARGETS or basin_name not in basin_ids:
+            raise ValueError(f"Unknown series: {target} {basin_name}")
+        spawn_key = (int(year_forecast), int(week_forecast), SERIES_TARGETS.index(target), basins.index(basin_name))
+        seeds.append(np.random.SeedSequence(root.entropy, spawn_key=spawn_key))
+    return seeds
+
+
+def _baseline_quantile_table(series, nsamples, horizon, symmetrize, seeds):
+    forecast_samples = quantile_baseline_batch(series, 
+                                               nsamples=nsamples, 
+                                               horizon=horizon, 
+                                               symmetrize=symmetrize, 
+                                               seeds=seeds)
+    return compute_quantile_table(forecast_samples, quantiles=QUANTILES)
+
+
+def compute_baseline_quantile_table(series, 
+                                    nsamples, 
+                                    horizon, 
+                                    symmetrize, 
+                                    seeds, 
+                                    workers=1):
+    """
+    Compute the baseline quantile table of several series, optionally on a process pool.
+
+    Series are split in contiguous chunks, one per worker. Since each series 
+    has its own random stream the result does not depend on the number of workers.
+
+    Returns:
+    - np.ndarray: quantile table with shape (len(series), len(QUANTILES), horizon).
+    """
+
+    if workers <= 1 or len(series) <= 1:
+        return _baseline_quantile_table(series, nsamples, horizon, symmetrize, seeds)
+
+    chunks = [chunk for chunk in np.array_split(np.arange(len(series)), workers) if len(chunk) > 0]
+    with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+        futures = [executor.submit(_baseline_quantile_table, 
+                                   [series[i] for i in chunk], 
+                                   nsamples, horizon, symmetrize, 
+                                   [seeds[i] for i in chunk]) for chunk in chunks]
+        return np.concatenate([future.result() for future in futures], axis=0)
 
 
 def generate_baseline_quantile_forecast(training_data, 
                                         nsamples, 
                                         horizon, 
                                         symmetrize, 
-                                        include_training=False):
+                                        include_training=False, 
+                                        rng=None):
     """
     Run full pipeline for quantile baseline forecast
 
@@ -138,16 +460,17 @@ def generate_baseline_quantile_forecast(training_data,
     - horizon (int): forecasting horizon in steps 
     - symmetrize (bool): if True one-step differences are symmetrized. (Defaults to True).
     - include_training (bool): if True includes also training data in returned array. (Defaults to True).
+    - rng: np.random.Generator, or seed for np.random.default_rng. (Defaults to None, i.e. unseeded).
 
     Returns:
     - pd.DataFrame: DataFrame containing the computed quantiles and aggregated measures.
     """
 
     # generate forecasts
-    forecast_samples = quantile_baseline(training_data, nsamples, horizon, symmetrize, include_training=include_training)
+    forecast_samples = quantile_baseline(training_data, nsamples, horizon, symmetrize, include_training=include_training, rng=rng)
 
-    # compute quantiles
-    forecast_quantiles = compute_quantiles(forecast_samples)
+    # compute only the published quantiles
+    forecast_quantiles = compute_quantiles(forecast_samples, quantiles=QUANTILES, extra_measures=False)
     return forecast_quantiles
 
 
@@ -165,34 +488,182 @@ def format_file(anno_forecast,
                 data_forecast,
                 basin_id,
                 target,
-                quantiles = [0.01, 0.025, 0.05, 0.1, 0.15, 0.2, 0.25, 0.3,
-                             0.35, 0.4, 0.45, 0.5, 0.55, 0.6, 0.65, 0.7, 
-                             0.75, 0.8, 0.85, 0.9, 0.95, 0.975, 0.99]):
+                quantiles = QUANTILES, 
+                horizon = 4):
     
     data_forecast.sort_values(by="data_inizio", inplace=True, ascending=True)	
 
-    anno, settimana, luogo, tipo_valore, id_valore, orizzonte, valore = [], [], [], [], [], [], []
-    for q in quantiles:
-        for horizon in [0, 1, 2, 3]:
+    values = np.stack([data_forecast[str(q)].values[:horizon] for q in quantiles])
+    return format_forecast_table(anno=anno_forecast, 
+                                 settimana=settimana_forecast, 
+                                 luoghi=[basin_id], 
+                                 targets=[target], 
+                                 quantiles=quantiles, 
+                                 values=values[np.newaxis])
+
+
+def load_truth_data(season, 
+                    basin_name, 
+                    target, 
+                    source=None):
+    
+    # read ground truth data
+    target_folder = 'ARI+_FLU' if target.startswith('ARI+_FLU') else target
+
+    source = DataSource() if source is None else source
+    path = f"sorveglianza/{target_folder}/{season}/latest/{basin_name}-latest-{target}.csv"
+
+    print('Path: ', source.location(path))
 
-            anno.append(int(anno_forecast))
-            settimana.append(int(settimana_forecast))
-            luogo.append(basin_id)
-            tipo_valore.append("quantile")
-            id_valore.append(q)
-            orizzonte.append(horizon + 1)
-            valore.append(data_forecast[str(q)].values[horizon])
+    return source.read_csv(path, dtype=TRUTH_DTYPES, engine=csv_engine())
 
-    df_formatted = pd.DataFrame(data={"anno": anno, 
-                                      "settimana": settimana, 
-                                      "luogo": luogo, 
-                                      "tipo_valore": tipo_valore, 
-                                      "id_valore": id_valore, 
-                                      "orizzonte": orizzonte, 
-                                      "valore": valore})
-    df_formatted ['target'] = target
 
-    return df_formatted
+def load_baseline_data(season, 
+                       series_keys, 
+                       data_root=None):
+    """
+    Read the season calendar and the latest surveillance data of each series once
+
+    Parameters:
+    - season (str): surveillance season, e.g. "2025-2026"
+    - series_keys (list): (target, basin_name) pairs to forecast
+    - data_root (str): local checkout or base URL of the data repository. (Defaults to None, i.e. read from GitHub).
+
+    Returns:
+    - tuple: season calendar (SeasonCalendar) and dict (target, basin_name) -> surveillance data.
+    """
+
+    source = DataSource(data_root)
+    calendar = load_season_calendar(season, data_root)
+    truth_data = {(target, basin_name): load_truth_data(season, basin_name, target, source) 
+                  for target, basin_name in series_keys}
+    return calendar, truth_data
+
+
+def compute_baseline_round(calendar, 
+                           truth_data, 
+                           year_forecast, 
+                           week_forecast, 
+                           series_keys,
+                           measure="incidenza", 
+                           nsamples=1000,
+                           horizon=4,
+                           symmetrize=True, 
+                           seed=None, 
+                           workers=1, 
+                           exact=False, 
+                           resolution=1e-3, 
+                           as_of=False, 
+                           chunk_size=None, 
+                           nbins=4096): 
+    """
+    Compute the quantile baseline forecast of several series for one forecasting round
+
+    Parameters:
+    - calendar (SeasonCalendar): season calendar
+    - truth_data (dict): (target, basin_name) -> surveillance data
+    - year_forecast (int): year of the forecasting round
+    - week_forecast (int): week of the forecasting round
+    - series_keys (list): (target, basin_name) pairs to forecast
+    - measure (str): column of the surveillance data used as training data. (Defaults to "incidenza").
+    - nsamples (int): number of forecasting samples
+    - horizon (int): forecasting horizon in steps 
+    - symmetrize (bool): if True one-step differences are symmetrized. (Defaults to True).
+    - seed (int): root seed of the per-series random streams. (Defaults to None, i.e. unseeded).
+    - workers (int): number of worker processes. (Defaults to 1).
+    - exact (bool): if True quantiles are computed analytically instead of by sampling. (Defaults to False).
+    - resolution (float): lattice step of the exact engine. (Defaults to 1e-3).
+    - as_of (bool): if True training data is truncated to the weeks up to the forecasting round. (Defaults to False).
+    - chunk_size (int): if given samples are generated in chunks and folded into histograms. (Defaults to None).
+    - nbins (int): number of histogram bins per horizon of the streaming engine. (Defaults to 4096).
+
+    Returns:
+    - pd.DataFrame: formatted forecasts of all series.
+    """
+
+    keys, training_data = [], []
+    for key in series_keys:
+        truth_data_series = truth_data[key]
+        if as_of:
+            truth_data_series = truth_data_series.loc[truth_data_series.anno * 100 + truth_data_series.settimana <= \
+                                                      int(year_forecast) * 100 + int(week_forecast)]
+        if truth_data_series.shape[0] <= 1: 
+            continue
+        keys.append(key)
+        training_data.append(truth_data_series)
+
+    if len(keys) == 0:
+        return pd.DataFrame()
+
+    # check that forecast weeks are in the season calendar
+    for df in training_data:
+        start_idx = calendar.index(df.anno.values[-1], df.settimana.values[-1])
+        if start_idx + horizon >= len(calendar):
+            raise ValueError(f"Season calendar ends before horizon {horizon} of week {df.anno.values[-1]}_{df.settimana.values[-1]}")
+
+    if exact:
+        # exact forecast distribution, no sampling
+        forecast_quantiles = np.stack([exact_quantile_baseline(df[measure].values, 
+                                                               horizon=horizon, 
+                                                               symmetrize=symmetrize, 
+                                                               quantiles=QUANTILES, 
+                                                               resolution=resolution) for df in training_data])
+    elif chunk_size is not None:
+        # bounded memory sampling, one random stream per series
+        seeds = series_seed_sequences(seed, year_forecast, week_forecast, keys)
+        results = [streaming_quantile_baseline(df[measure].values, 
+                                               nsamples=nsamples, 
+                                               horizon=horizon, 
+                                               symmetrize=symmetrize, 
+                                               quantiles=QUANTILES, 
+                                               chunk_size=chunk_size, 
+                                               nbins=nbins, 
+                                               rng=np.random.default_rng(seeds[i])) for i, df in enumerate(training_data)]
+        forecast_quantiles = np.stack([result[0] for result in results])
+        print(f"Streaming quantiles error bound: {max(result[1].max() for result in results):.6f}")
+    else:
+        # generate baseline forecasts of all series, one random stream per series
+        seeds = series_seed_sequences(seed, year_forecast, week_forecast, keys)
+        forecast_quantiles = compute_baseline_quantile_table([df[measure].values for df in training_data], 
+                                                             nsamples=nsamples, 
+                                                             horizon=horizon, 
+                                                             symmetrize=symmetrize, 
+                                                             seeds=seeds, 
+                                                             workers=workers)
+
+    # format file
+    return format_forecast_table(anno=year_forecast, 
+                                 settimana=week_forecast, 
+                                 luoghi=[basin_ids[basin_name] for _, basin_name in keys], 
+                                 targets=[target for target, _ in keys], 
+                                 quantiles=QUANTILES, 
+                                 values=forecast_quantiles)
+
+
+def generate_baseline_forecast_batch(season, 
+                                     year_forecast, 
+                                     week_forecast, 
+                                     series_keys,
+                                     data_root=None, 
+                                     **kwargs): 
+    """
+    Run full pipeline for the quantile baseline forecast of several series
+
+    Parameters:
+    - season (str): surveillance season, e.g. "2025-2026"
+    - year_forecast (int): year of the forecasting round
+    - week_forecast (int): week of the forecasting round
+    - series_keys (list): (target, basin_name) pairs to forecast
+    - data_root (str): local checkout or base URL of the data repository. (Defaults to None, i.e. read from GitHub).
+    - **kwargs: forecasting options, see compute_baseline_round.
+
+    Returns:
+    - pd.DataFrame: formatted forecasts of all series.
+    """
+
+    # read ground truth data and weeks
+    calendar, truth_data = load_baseline_data(season, series_keys, data_root)
+    return compute_baseline_round(calendar, truth_data, year_forecast, week_forecast, series_keys, **kwargs)
 
 
 def generate_baseline_forecast_fullpipeline(season, 
@@ -203,77 +674,177 @@ def generate_baseline_forecast_fullpipeline(season,
                                             measure="incidenza", 
                                             nsamples=1000,
                                             horizon=4,
-                                            symmetrize=True): 
+                                            symmetrize=True, 
+                                            seed=None): 
     
-    # read ground truth data and weeks
-    target_folder = 'ARI+_FLU' if target.startswith('ARI+_FLU') else target
+    return generate_baseline_forecast_batch(season=season, 
+                                            year_forecast=year_forecast, 
+                                            week_forecast=week_forecast, 
+                                            series_keys=[(target, basin_name)],
+                                            measure=measure, 
+                                            nsamples=nsamples,
+                                            horizon=horizon,
+                                            symmetrize=symmetrize, 
+                                            seed=seed)
+
+
+def season_rounds(calendar, 
+                  truth_data, 
+                  rounds=None):
+    """
+    List the forecasting rounds of a season that have surveillance data
+
+    Parameters:
+    - calendar (SeasonCalendar): season calendar
+    - truth_data (dict): (target, basin_name) -> surveillance data
+    - rounds (str): optional range of rounds "YYYY_WW:YYYY_WW" (bounds included)
 
-    path = f"https://raw.githubusercontent.com/Predizioni-Epidemiologiche-Italia/Influcast/main/sorveglianza/{target_folder}/{season}/latest/"
+    Returns:
+    - list: (year, week) of each round, in calendar order.
+    """
 
-    print('Path: ', os.path.join(path, basin_name + "-latest-" + target + ".csv"))
+    observed = set()
+    for df in truth_data.values():
+        observed.update(zip(df.anno.astype(int), df.settimana.astype(int)))
 
-    isoweeks = pd.read_csv(f"https://raw.githubusercontent.com/Predizioni-Epidemiologiche-Italia/Influcast/main/supporting-files/settimane_{season}.csv")
-    truth_data = pd.read_csv(os.path.join(path, basin_name + "-latest-" + target + ".csv"))
+    weeks = [week for week in calendar.year_weeks() if week in observed]
+    if rounds is not None:
+        start, end = parse_rounds(rounds)
+        weeks = [week for week in weeks if start <= week <= end]
+    return weeks
 
-    if truth_data.shape[0] <= 1: 
+
+def _backfill_round(calendar, truth_data, year_forecast, week_forecast, series_keys, kwargs):
+    # rounds at the end of the season may run out of calendar: skip them, not the whole season
+    try:
+        return compute_baseline_round(calendar, truth_data, year_forecast, week_forecast, series_keys, 
+                                      as_of=True, **kwargs)
+    except ValueError as error:
+        print(f"Skipping round {year_forecast}_{week_forecast:02d}: {error}")
         return pd.DataFrame()
-    
-    # generate baseline forecast
-    baseline_forecast = generate_baseline_quantile_forecast(training_data=truth_data[measure].values, 
-                                                            nsamples=nsamples, 
-                                                            horizon=horizon, 
-                                                            symmetrize=symmetrize)
-    
-    # add weeks
-    start_idx = isoweeks.loc[(isoweeks.anno == truth_data.anno.values[-1]) & \
-                             (isoweeks.settimana == truth_data.settimana.values[-1])].index[0]
-    baseline_forecast = pd.merge(left=baseline_forecast, 
-                                 right=isoweeks.iloc[start_idx+1:start_idx+1+4].reset_index(drop=True), 
-                                 left_index=True, right_index=True)
-    
-    # format file
-    baseline_forecast_formatted = format_file(anno_forecast=year_forecast, 
-                                              settimana_forecast=week_forecast,
-                                              data_forecast=baseline_forecast,
-                                              target=target, 
-                                              basin_id=basin_ids[basin_name])
-    return baseline_forecast_formatted
-
-
-# get date
-iso_year, iso_week, _ = date.today().isocalendar()
-week = Week(iso_year, iso_week) - 2
-
-target_list = targets.split(' ')
-
-# compute quantile baseline
-baseline_forecast_formatted = pd.DataFrame()
-
-for target in target_list:
-
-    regions = basin_ids.keys() if target == "ARI" else basin_ids_plus.keys()
-
-    for region in regions:
-        baseline_reg = generate_baseline_forecast_fullpipeline(
-                                                season=season, 
-                                                year_forecast=week.year, 
-                                                week_forecast=week.week, 
-                                                basin_name=region,
-                                                target=target,
-                                                measure=measure, 
-                                                nsamples=nsamples,
-                                                horizon=horizon,
-                                                symmetrize=symmetrize)
-        
-        baseline_forecast_formatted = pd.concat((baseline_forecast_formatted, baseline_reg), ignore_index=False)
-
-if week.week < 10: 
-    year_week = str(week.year) + "_0" + str(week.week)
-else: 
-    year_week = str(week.year) + "_" + str(week.week)
-baseline_forecast_formatted.to_csv(f"./repo/previsioni/{team_abbr}-{model_abbr}/{year_week}.csv", index=False)
-
-env_file = os.getenv('GITHUB_OUTPUT')
-with open(env_file, "a") as outenv:
-   outenv.write (f"baseline_file={year_week}.csv")
 
+
+def backfill_baseline(season, 
+                      series_keys, 
+                      rounds=None, 
+                      workers=1, 
+                      data_root=None, 
+                      **kwargs):
+    """
+    Regenerate the quantile baseline of every forecasting round of a season
+
+    Surveillance data and calendar are read once; each round is trained on 
+    the data up to its own week, and rounds are spread over a process pool.
+
+    Parameters:
+    - season (str): surveillance season, e.g. "2025-2026"
+    - series_keys (list): (target, basin_name) pairs to forecast
+    - rounds (str): optional range of rounds "YYYY_WW:YYYY_WW" (bounds included)
+    - workers (int): number of worker processes. (Defaults to 1).
+    - data_root (str): local checkout or base URL of the data repository. (Defaults to None, i.e. read from GitHub).
+    - **kwargs: forecasting options, see compute_baseline_round.
+
+    Returns:
+    - dict: (year, week) -> formatted forecasts of the round.
+    """
+
+    calendar, truth_data = load_baseline_data(season, series_keys, data_root)
+    weeks = season_rounds(calendar, truth_data, rounds)
+
+    if workers <= 1:
+        forecasts = [_backfill_round(calendar, truth_data, year, week, series_keys, kwargs) for year, week in weeks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_backfill_round, calendar, truth_data, year, week, series_keys, kwargs) 
+                       for year, week in weeks]
+            forecasts = [future.result() for future in futures]
+
+    return {week: df for week, df in zip(weeks, forecasts) if not df.empty}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--season')
+    parser.add_argument('--targets', default="ARI ARI+_FLU_A ARI+_FLU_B")
+    parser.add_argument('--measure', default="incidenza")
+    parser.add_argument('--symmetrize', default=True)
+    parser.add_argument('--nsamples', default=10000)
+    parser.add_argument('--horizon', default=4)
+    parser.add_argument('--team_abbr', default="Influcast")
+    parser.add_argument('--model_abbr', default="quantileBaseline")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--exact', action='store_true')
+    parser.add_argument('--resolution', type=float, default=1e-3)
+    parser.add_argument('--chunk_size', type=int, default=None, help='Generate samples in chunks of this size (bounded memory)')
+    parser.add_argument('--nbins', type=int, default=4096)
+    parser.add_argument('--backfill', action='store_true', help='Regenerate every round of the season')
+    parser.add_argument('--rounds', default=None, help='Range of rounds to backfill, e.g. 2025_45:2026_15')
+    parser.add_argument('--data_root', '--data-root', default=None, help='Local checkout or base URL of the data repository')
+
+    args = parser.parse_args()
+    season = str(args.season)
+    targets = str(args.targets)
+    horizon = int(args.horizon)
+    symmetrize = bool(args.symmetrize)
+    nsamples = int(args.nsamples)
+    team_abbr = str(args.team_abbr)
+    model_abbr = str(args.model_abbr)
+    measure = str(args.measure)
+    seed = args.seed
+    workers = args.workers
+    exact = args.exact
+    resolution = args.resolution
+
+    target_list = targets.split(' ')
+
+    # compute quantile baseline of all targets and regions at once
+    series_keys = []
+    for target in target_list:
+        regions = basin_ids.keys() if target == "ARI" else basin_ids_plus.keys()
+        series_keys.extend((target, region) for region in regions)
+
+    options = dict(measure=measure, 
+                   nsamples=nsamples,
+                   horizon=horizon,
+                   symmetrize=symmetrize, 
+                   seed=seed, 
+                   exact=exact, 
+                   resolution=resolution, 
+                   chunk_size=args.chunk_size, 
+                   nbins=args.nbins)
+
+    if args.backfill or args.rounds is not None:
+        # regenerate all rounds, one round per worker
+        forecasts = backfill_baseline(season, series_keys, rounds=args.rounds, workers=workers, data_root=args.data_root, **options)
+        for (year, week), baseline_forecast_formatted in forecasts.items():
+            baseline_forecast_formatted.to_csv(f"./repo/previsioni/{team_abbr}-{model_abbr}/{year}_{week:02d}.csv", index=False)
+        print(f"Wrote {len(forecasts)} rounds")
+        return
+
+    # get date
+    iso_year, iso_week, _ = date.today().isocalendar()
+    week = Week(iso_year, iso_week) - 2
+
+    baseline_forecast_formatted = generate_baseline_forecast_batch(
+                                            season=season, 
+                                            year_forecast=week.year, 
+                                            week_forecast=week.week, 
+                                            series_keys=series_keys,
+                                            data_root=args.data_root, 
+                                            workers=workers, 
+                                            **options)
+
+    if week.week < 10: 
+        year_week = str(week.year) + "_0" + str(week.week)
+    else: 
+        year_week = str(week.year) + "_" + str(week.week)
+    baseline_forecast_formatted.to_csv(f"./repo/previsioni/{team_abbr}-{model_abbr}/{year_week}.csv", index=False)
+
+    env_file = os.getenv('GITHUB_OUTPUT')
+    with open(env_file, "a") as outenv:
+       outenv.write (f"baseline_file={year_week}.csv")
+
+
+if __name__ == "__main__":
+    main()
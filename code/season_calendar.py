@@ -0,0 +1,93 @@
+"""
+Season calendar of the Influcast hub (supporting-files/settimane_{season}.csv).
+
+The calendar is read once per process and indexed by (anno, settimana), so
+week lookups are O(1).
+"""
+
+from datetime import date, timedelta
+from functools import lru_cache
+
+import pandas as pd
+
+from data_source import DataSource
+
+
+def iso_week_dates(year, week, horizon=0):
+    """
+    Start (Monday) and end (Sunday) dates of the ISO week `horizon` weeks
+    after (year, week).
+    """
+    monday = date.fromisocalendar(int(year), int(week), 1) + timedelta(weeks=int(horizon))
+    return monday, monday + timedelta(days=6)
+
+
+class SeasonCalendar:
+    """
+    Weeks of a surveillance season with a (anno, settimana) -> row index.
+    """
+
+    def __init__(self, weeks=None):
+        if weeks is None:
+            weeks = pd.DataFrame(columns=["anno", "settimana", "data_inizio"])
+        self.weeks = weeks.reset_index(drop=True)
+        self._index = {(int(year), int(week)): i
+                       for i, (year, week) in enumerate(zip(self.weeks.anno, self.weeks.settimana))}
+
+    def __len__(self):
+        return len(self.weeks)
+
+    def __contains__(self, year_week):
+        year, week = year_week
+        return (int(year), int(week)) in self._index
+
+    def index(self, year, week):
+        """
+        Row of (year, week) in the calendar; raises KeyError if missing.
+        """
+        try:
+            return self._index[(int(year), int(week))]
+        except KeyError:
+            raise KeyError(f"Week {year}_{int(week):02d} is not in the season calendar") from None
+
+    def year_weeks(self):
+        """
+        (anno, settimana) of every calendar week, in calendar order.
+        """
+        return list(self._index)
+
+
+def parse_rounds(rounds):
+    """
+    Parse a range of forecasting rounds "YYYY_WW:YYYY_WW" into (year, week) bounds.
+    """
+    start, end = rounds.split(":")
+    return tuple(int(v) for v in start.split("_")), tuple(int(v) for v in end.split("_"))
+
+
+def rounds_in_range(rounds):
+    """
+    (year, week) of every ISO week in a range of rounds "YYYY_WW:YYYY_WW" (bounds included).
+    """
+    start, end = parse_rounds(rounds)
+    weeks = []
+    monday, _ = iso_week_dates(*start)
+    while tuple(monday.isocalendar())[:2] <= end:
+        weeks.append(tuple(monday.isocalendar())[:2])
+        monday += timedelta(weeks=1)
+    return weeks
+
+
+@lru_cache(maxsize=None)
+def load_season_calendar(season, data_root=None):
+    """
+    Read the calendar of a season once per process.
+
+    Parameters:
+    - season (str): surveillance season, e.g. "2025-2026"
+    - data_root (str): local checkout or base URL of the data repository. (Defaults to None, i.e. read from GitHub).
+
+    Returns:
+    - SeasonCalendar: calendar of the season.
+    """
+    return SeasonCalendar(DataSource(data_root).read_csv(f"supporting-files/settimane_{season}.csv"))